@@ -2,7 +2,7 @@ from datetime import datetime, timedelta, timezone
 import bcrypt
 
 try:
-    from jose import jwt
+    import jwt  # PyJWT
 except Exception:
     jwt = None
 
@@ -21,7 +21,7 @@ def verify_password(password: str, password_hash: str) -> bool:
 
 def create_access_token(subject: str, extra: dict | None = None) -> str:
     if jwt is None:
-        raise RuntimeError("Missing dependency: python-jose. Install with: pip install python-jose")
+        raise RuntimeError("Missing dependency: PyJWT. Install with: pip install PyJWT")
 
     now = datetime.now(timezone.utc)
     payload = {
@@ -36,5 +36,5 @@ def create_access_token(subject: str, extra: dict | None = None) -> str:
 
 def decode_token(token: str) -> dict:
     if jwt is None:
-        raise RuntimeError("Missing dependency: python-jose. Install with: pip install python-jose")
+        raise RuntimeError("Missing dependency: PyJWT. Install with: pip install PyJWT")
     return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
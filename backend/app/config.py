@@ -6,6 +6,10 @@ load_dotenv()
 # Mongo
 MONGO_URI = os.getenv("MONGO_URI", "")
 MONGO_DB = os.getenv("MONGO_DB", "driver_behavior")
+MONGO_MAX_POOL = int(os.getenv("MONGO_MAX_POOL", "200"))
+MONGO_MIN_POOL = int(os.getenv("MONGO_MIN_POOL", "20"))
+# zstd comes from the pymongo[zstd] extra; pymongo skips any codec it can't load.
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
 
 # JWT
 JWT_SECRET = os.getenv("JWT_SECRET", "CHANGE_ME_SUPER_SECRET")
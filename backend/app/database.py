@@ -5,11 +5,23 @@ Removed: institute_codes, join_code indexes, trainee_of_instructor_id
 Added:   instructor_profiles, availability, bookings, reviews
 """
 
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, IndexModel
 from pymongo.errors import OperationFailure
-from app.config import MONGO_URI, MONGO_DB
-
-client = MongoClient(MONGO_URI)
+from app.config import (
+    MONGO_URI, MONGO_DB, MONGO_MAX_POOL, MONGO_MIN_POOL, MONGO_COMPRESSORS,
+)
+
+# One client per process, shared by every router. Bounded waits so a burst
+# fails fast instead of piling up threadpool workers on socket checkout.
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL,
+    minPoolSize=MONGO_MIN_POOL,
+    waitQueueTimeoutMS=2500,
+    serverSelectionTimeoutMS=3000,
+    socketTimeoutMS=10000,
+    compressors=MONGO_COMPRESSORS,
+)
 db = client[MONGO_DB]
 
 # ── Collections ─────────────────────────────────────────────────────────────
@@ -25,60 +37,72 @@ reviews_col             = db["reviews"]
 settings_col            = db["settings"]
 
 
-def _safe_create_index(col, keys, **kwargs):
+# ── Indexes ─────────────────────────────────────────────────────────────────
+# Single source of truth, keyed by collection name. ensure_indexes() builds
+# these at API startup and the seed scripts read the same table.
+
+INDEX_SPECS = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+        IndexModel([("role", ASCENDING), ("created_at", DESCENDING)], name="role_created"),
+    ],
+    "institute_codes": [
+        IndexModel([("code", ASCENDING)], unique=True, name="ic_code_unique"),
+        IndexModel([("used", ASCENDING)], name="ic_used"),
+    ],
+    "instructor_profiles": [
+        IndexModel([("instructor_id", ASCENDING)], unique=True, name="ip_instructor_id"),
+        IndexModel([("rating", DESCENDING)], name="ip_rating"),
+        IndexModel([("active", ASCENDING), ("rating", DESCENDING)], name="ip_active_rating"),
+        IndexModel([("specialties", ASCENDING)], name="ip_specialties"),
+        IndexModel([("location_area", ASCENDING)], name="ip_location"),
+    ],
+    "availability": [
+        IndexModel([("instructor_id", ASCENDING), ("date", ASCENDING)], name="av_instructor_date"),
+        IndexModel([("slot_id", ASCENDING)], unique=True, name="av_slot_id"),
+        IndexModel([("status", ASCENDING), ("date", ASCENDING)], name="av_status_date"),
+        IndexModel([("instructor_id", ASCENDING), ("status", ASCENDING), ("date", ASCENDING)], name="av_inst_status_date"),
+    ],
+    "bookings": [
+        IndexModel([("booking_id", ASCENDING)], unique=True, name="bk_booking_id"),
+        IndexModel([("trainee_id", ASCENDING), ("created_at", DESCENDING)], name="bk_trainee_created"),
+        IndexModel([("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="bk_instructor_created"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="bk_status_created"),
+        IndexModel([("slot_id", ASCENDING)], name="bk_slot_id"),
+    ],
+    "sessions": [
+        IndexModel([("session_id", ASCENDING)], unique=True, name="ss_session_id"),
+        IndexModel([("trainee_id", ASCENDING), ("created_at", DESCENDING)], name="ss_trainee_created"),
+        IndexModel([("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="ss_instructor_created"),
+        IndexModel([("booking_id", ASCENDING)], name="ss_booking_id"),
+        IndexModel([("status", ASCENDING)], name="ss_status"),
+    ],
+    "results": [
+        IndexModel([("session_id", ASCENDING)], name="rs_session_id"),
+        IndexModel([("trainee_id", ASCENDING), ("created_at", DESCENDING)], name="rs_trainee_created"),
+        IndexModel([("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="rs_instructor_created"),
+        IndexModel([("booking_id", ASCENDING)], name="rs_booking_id"),
+    ],
+    "reviews": [
+        IndexModel([("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="rv_instructor_created"),
+        IndexModel([("trainee_id", ASCENDING)], name="rv_trainee"),
+        IndexModel([("review_id", ASCENDING)], unique=True, name="rv_review_id"),
+    ],
+    "settings": [
+        IndexModel([("user_id", ASCENDING)], unique=True, name="st_user_id"),
+    ],
+}
+
+
+def _safe_create_index(col, index):
     try:
-        col.create_index(keys, **kwargs)
+        col.create_indexes([index])
     except (OperationFailure, Exception):
         pass
 
 
 def ensure_indexes():
-    # ── USERS ───────────────────────────────────────────────────────────
-    _safe_create_index(users_col, [("email", ASCENDING)], unique=True, name="email_unique")
-    _safe_create_index(users_col, [("user_id", ASCENDING)], unique=True, name="user_id_unique")
-    _safe_create_index(users_col, [("role", ASCENDING), ("created_at", DESCENDING)], name="role_created")
-
-    # ── INSTITUTE CODES ─────────────────────────────────────────────────
-    _safe_create_index(institute_codes_col, [("code", ASCENDING)], unique=True, name="ic_code_unique")
-    _safe_create_index(institute_codes_col, [("used", ASCENDING)], name="ic_used")
-
-    # ── INSTRUCTOR PROFILES ─────────────────────────────────────────────
-    _safe_create_index(instructor_profiles_col, [("instructor_id", ASCENDING)], unique=True, name="ip_instructor_id")
-    _safe_create_index(instructor_profiles_col, [("rating", DESCENDING)], name="ip_rating")
-    _safe_create_index(instructor_profiles_col, [("active", ASCENDING), ("rating", DESCENDING)], name="ip_active_rating")
-    _safe_create_index(instructor_profiles_col, [("specialties", ASCENDING)], name="ip_specialties")
-    _safe_create_index(instructor_profiles_col, [("location_area", ASCENDING)], name="ip_location")
-
-    # ── AVAILABILITY ────────────────────────────────────────────────────
-    _safe_create_index(availability_col, [("instructor_id", ASCENDING), ("date", ASCENDING)], name="av_instructor_date")
-    _safe_create_index(availability_col, [("slot_id", ASCENDING)], unique=True, name="av_slot_id")
-    _safe_create_index(availability_col, [("status", ASCENDING), ("date", ASCENDING)], name="av_status_date")
-    _safe_create_index(availability_col, [("instructor_id", ASCENDING), ("status", ASCENDING), ("date", ASCENDING)], name="av_inst_status_date")
-
-    # ── BOOKINGS ────────────────────────────────────────────────────────
-    _safe_create_index(bookings_col, [("booking_id", ASCENDING)], unique=True, name="bk_booking_id")
-    _safe_create_index(bookings_col, [("trainee_id", ASCENDING), ("created_at", DESCENDING)], name="bk_trainee_created")
-    _safe_create_index(bookings_col, [("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="bk_instructor_created")
-    _safe_create_index(bookings_col, [("status", ASCENDING), ("created_at", DESCENDING)], name="bk_status_created")
-    _safe_create_index(bookings_col, [("slot_id", ASCENDING)], name="bk_slot_id")
-
-    # ── SESSIONS ────────────────────────────────────────────────────────
-    _safe_create_index(sessions_col, [("session_id", ASCENDING)], unique=True, name="ss_session_id")
-    _safe_create_index(sessions_col, [("trainee_id", ASCENDING), ("created_at", DESCENDING)], name="ss_trainee_created")
-    _safe_create_index(sessions_col, [("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="ss_instructor_created")
-    _safe_create_index(sessions_col, [("booking_id", ASCENDING)], name="ss_booking_id")
-    _safe_create_index(sessions_col, [("status", ASCENDING)], name="ss_status")
-
-    # ── RESULTS ─────────────────────────────────────────────────────────
-    _safe_create_index(results_col, [("session_id", ASCENDING)], name="rs_session_id")
-    _safe_create_index(results_col, [("trainee_id", ASCENDING), ("created_at", DESCENDING)], name="rs_trainee_created")
-    _safe_create_index(results_col, [("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="rs_instructor_created")
-    _safe_create_index(results_col, [("booking_id", ASCENDING)], name="rs_booking_id")
-
-    # ── REVIEWS ─────────────────────────────────────────────────────────
-    _safe_create_index(reviews_col, [("instructor_id", ASCENDING), ("created_at", DESCENDING)], name="rv_instructor_created")
-    _safe_create_index(reviews_col, [("trainee_id", ASCENDING)], name="rv_trainee")
-    _safe_create_index(reviews_col, [("review_id", ASCENDING)], unique=True, name="rv_review_id")
-
-    # ── SETTINGS ────────────────────────────────────────────────────────
-    _safe_create_index(settings_col, [("user_id", ASCENDING)], unique=True, name="st_user_id")
+    for name, indexes in INDEX_SPECS.items():
+        for index in indexes:
+            _safe_create_index(db[name], index)
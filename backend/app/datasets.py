@@ -1,32 +1,78 @@
 """
 app/datasets.py
 Helpers for resolving and picking simulation CSV datasets.
+
+The dataset directory is treated as static for the lifetime of the process:
+the rglob scan and the motor/non-motor split are computed once and cached.
+Call ``refresh_datasets()`` after adding or removing CSVs without a restart.
+
+Picks rotate round-robin through each pool rather than sampling at random, so
+the set of CSVs being read (and page-cached) stays small and predictable.
 """
 from __future__ import annotations
 
-import random
+import itertools
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, Tuple
 
 from fastapi import HTTPException
 
 from app.config import DATASETS_ROOT
 
 
+@lru_cache(maxsize=1)
 def resolve_datasets_root() -> Path:
     base = Path(DATASETS_ROOT) if DATASETS_ROOT else (Path.cwd() / "datasets")
     return base.resolve()
 
 
-def list_all_csvs() -> List[Path]:
+@lru_cache(maxsize=1)
+def list_all_csvs() -> Tuple[Path, ...]:
     root = resolve_datasets_root()
     if not root.exists():
-        return []
-    return [p for p in root.rglob("*.csv") if p.is_file()]
+        return ()
+    return tuple(p for p in root.rglob("*.csv") if p.is_file())
+
+
+@lru_cache(maxsize=1)
+def _csv_pools() -> Tuple[Tuple[Path, ...], Tuple[Path, ...]]:
+    """(motor_like, non_motor_like) split of list_all_csvs()."""
+    csvs = list_all_csvs()
+    motor_like = tuple(p for p in csvs if "motor" in p.name.lower() or "highway" in p.name.lower())
+    non_motor_like = tuple(p for p in csvs if p not in motor_like)
+    return motor_like, non_motor_like
+
+
+# One rotation per pool; next() on a shared cycle isn't thread-safe.
+_rotations: Dict[Tuple[Path, ...], Iterator[Path]] = {}
+_rotation_lock = threading.Lock()
+
+
+def _next_in_rotation(pool: Tuple[Path, ...]) -> Path:
+    with _rotation_lock:
+        it = _rotations.get(pool)
+        if it is None:
+            it = _rotations[pool] = itertools.cycle(sorted(pool))
+        return next(it)
+
+
+def refresh_datasets() -> None:
+    """Drop the cached dataset scan so the next pick re-reads DATASETS_ROOT."""
+    resolve_datasets_root.cache_clear()
+    list_all_csvs.cache_clear()
+    _csv_pools.cache_clear()
+    with _rotation_lock:
+        _rotations.clear()
 
 
 def pick_csv_for_simulation(road_type: str) -> Path:
     csvs = list_all_csvs()
+    if not csvs:
+        # Don't let an empty scan stick — the folder may have been populated since.
+        refresh_datasets()
+        csvs = list_all_csvs()
     if not csvs:
         raise HTTPException(
             status_code=500,
@@ -34,7 +80,6 @@ def pick_csv_for_simulation(road_type: str) -> Path:
         )
     road = (road_type or "").strip().lower()
     wants_motor = road in ["motor", "motorway", "highway"]
-    motor_like = [p for p in csvs if "motor" in p.name.lower() or "highway" in p.name.lower()]
-    non_motor_like = [p for p in csvs if p not in motor_like]
+    motor_like, non_motor_like = _csv_pools()
     pool = motor_like if (wants_motor and motor_like) else (non_motor_like if non_motor_like else csvs)
-    return random.choice(pool)
+    return _next_in_rotation(pool)
@@ -11,8 +11,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.database import ensure_indexes
+from app.ml.keras_runtime import logger as ml_logger
+from app.ml.predictor import warmup as ml_warmup
+from app.utils import MongoJSONResponse
 
-app = FastAPI(title="DriveIQ Backend")
+app = FastAPI(title="DriveIQ Backend", default_response_class=MongoJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,3 +51,8 @@ app.include_router(sessions_router)
 @app.on_event("startup")
 def startup():
     ensure_indexes()
+    try:
+        ml_warmup()
+    except Exception as e:
+        # Keep serving non-ML routes; end-session will surface the real error.
+        ml_logger.warning(f"ML warmup skipped: {e}")
@@ -0,0 +1,96 @@
+"""
+app/ml/batcher.py
+Request-coalescing inference worker.
+
+Handlers are sync and run on FastAPI's threadpool, so concurrent end-session
+calls hand their windows to one worker thread, which waits briefly for other
+requests on the same model, runs a single forward pass and splits the rows back.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+MAX_BATCH = 32        # max requests folded into one forward pass
+MAX_WAIT_S = 0.010    # how long the first request waits for others to join
+
+_Item = Tuple[str, np.ndarray, Future]
+
+
+class InferenceBatcher:
+    """
+    Coalesces concurrent ``submit`` calls into batched ``run_model`` calls.
+
+    run_model(model_key, X) must return per-window outputs with X.shape[0] rows.
+    """
+
+    def __init__(
+        self,
+        run_model: Callable[[str, np.ndarray], np.ndarray],
+        max_batch: int = MAX_BATCH,
+        max_wait_s: float = MAX_WAIT_S,
+    ):
+        self._run_model = run_model
+        self._max_batch = max_batch
+        self._max_wait_s = max_wait_s
+        self._queue: "queue.Queue[_Item]" = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, X: np.ndarray, model_key: str) -> np.ndarray:
+        """Block until the batched forward pass for X has run; return its rows."""
+        fut: Future = Future()
+        self._ensure_worker()
+        self._queue.put((model_key, X, fut))
+        return fut.result()
+
+    # ── Worker ────────────────────────────────────────────────────────────────
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._loop, name="ml-inference-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _loop(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait_s
+            while len(items) < self._max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            groups: Dict[str, List[_Item]] = {}
+            for item in items:
+                groups.setdefault(item[0], []).append(item)
+            for model_key, group in groups.items():
+                self._dispatch(model_key, group)
+
+    def _dispatch(self, model_key: str, group: List[_Item]) -> None:
+        try:
+            X = group[0][1] if len(group) == 1 else np.concatenate([g[1] for g in group], axis=0)
+            out = self._run_model(model_key, X)
+        except Exception as e:
+            for _, _, fut in group:
+                fut.set_exception(e)
+            return
+
+        start = 0
+        for _, x, fut in group:
+            end = start + x.shape[0]
+            fut.set_result(out[start:end])
+            start = end
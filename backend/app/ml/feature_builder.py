@@ -1,20 +1,24 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 import numpy as np
 import pandas as pd
 
 
 def make_windows(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, np.ndarray],
     feature_cols: List[str],
     window_size: int,
-    road_type: str
-) -> Tuple[np.ndarray, List[int]]:
+    road_type: str,
+    return_idxs: bool = True,
+) -> Tuple[np.ndarray, Optional[List[int]]]:
     """
     Builds windows for inference.
 
+    `df` may also be a (rows, features) ndarray already in feature_cols order,
+    which skips the pandas column selection and cast.
+
     Returns:
       X: (num_windows, window_size, num_features)
-      idxs: window start indices
+      idxs: window start indices (None when return_idxs=False)
     """
 
     # ---------------------------------------
@@ -27,23 +31,20 @@ def make_windows(
     else:
         stride = 260
 
-    # Ensure required feature columns exist
-    for c in feature_cols:
-        if c not in df.columns:
-            df[c] = 0.0
-
-    x = df[feature_cols].astype("float32").to_numpy()
+    if isinstance(df, np.ndarray):
+        x = np.asarray(df, dtype=np.float32)
+    else:
+        # Missing feature columns come back zero-filled
+        x = df.reindex(columns=feature_cols, fill_value=0.0).to_numpy(dtype=np.float32)
     n = len(x)
 
-    windows = []
-    idxs = []
-
-    for start in range(0, n - window_size + 1, stride):
-        end = start + window_size
-        windows.append(x[start:end])
-        idxs.append(start)
+    starts = range(0, n - window_size + 1, stride)
+    idxs = list(starts) if return_idxs else None
 
-    if not windows:
-        return np.zeros((0, window_size, len(feature_cols)), dtype="float32"), []
+    if not starts:
+        return np.zeros((0, window_size, len(feature_cols)), dtype="float32"), idxs
 
-    return np.stack(windows, axis=0), idxs
\ No newline at end of file
+    # Strided view over x (no copy), then a single materialisation into the
+    # contiguous (num_windows, window_size, num_features) tensor.
+    view = np.lib.stride_tricks.sliding_window_view(x, window_size, axis=0)[::stride]
+    return np.ascontiguousarray(view.transpose(0, 2, 1)), idxs
\ No newline at end of file
@@ -1,22 +1,132 @@
 import os
 import json
+import logging
 import joblib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
 
 def _lazy_import_keras():
+    # Must be in the environment before TF is first imported.
+    os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "1")
+    cache_dir = os.getenv("XLA_CACHE_DIR")
+    if cache_dir and "tf_xla_persistent_cache_directory" not in os.environ.get("TF_XLA_FLAGS", ""):
+        # Reuse compiled XLA executables across restarts.
+        os.environ["TF_XLA_FLAGS"] = (
+            os.environ.get("TF_XLA_FLAGS", "") + f" --tf_xla_persistent_cache_directory={cache_dir}"
+        ).strip()
     try:
+        import tensorflow as tf
         from tensorflow import keras
-        return keras
     except Exception as e:
         raise RuntimeError(
             "TensorFlow is not installed or not working. "
             "Install: pip install tensorflow"
         ) from e
+    _configure_tf_threads(tf)
+    return keras
+
+
+def _intra_op_threads() -> int:
+    # Shared by the Keras graph and the TFLite interpreter so both honour TF_INTRA.
+    return int(os.getenv("TF_INTRA", "1"))
+
+
+def _configure_tf_threads(tf):
+    """
+    Keep TF from spawning a core-sized thread pool inside every API worker.
+    Override with TF_INTRA / TF_INTER when running a dedicated inference box.
+    """
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(_intra_op_threads())
+        tf.config.threading.set_inter_op_parallelism_threads(int(os.getenv("TF_INTER", "1")))
+    except RuntimeError:
+        # TF runtime already initialised elsewhere in the process; keep its settings.
+        pass
+
+
+def _scaler_params(scaler):
+    """(mean, 1/scale) of a fitted StandardScaler as float32, for (X - mean) * inv_scale."""
+    n = int(scaler.n_features_in_)
+    mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None else np.zeros(n)
+    scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones(n)
+    return np.asarray(mean, dtype=np.float32), (1.0 / np.asarray(scale, dtype=np.float64)).astype(np.float32)
+
+
+logger = logging.getLogger("driveiq.ml")
+
+def _make_infer_fn(model, input_shape):
+    """
+    Graph-compiled forward pass with a fixed (None, window, features) signature:
+    one trace for every batch size, and none of model.predict's per-call
+    dataset/callback machinery. XLA-fused unless ML_XLA=0.
+    """
+    import tensorflow as tf
+
+    spec = tf.TensorSpec([None, *input_shape], tf.float32)
+    jit = os.getenv("ML_XLA", "1") != "0"
+
+    @tf.function(input_signature=[spec], jit_compile=jit)
+    def graph_fn(x):
+        return model(x, training=False)
+
+    def infer(x: np.ndarray) -> np.ndarray:
+        return graph_fn(x).numpy()
+
+    return infer
+
+
+def _make_tflite_infer_fn(model_path):
+    """
+    Forward pass through a (quantised) TFLite interpreter; see
+    scripts/export_tflite.py. The interpreter is stateful, so calls are
+    serialised and the input is only re-allocated when the batch size changes.
+    """
+    import threading
+    import tensorflow as tf
+
+    interp = tf.lite.Interpreter(model_path=model_path, num_threads=_intra_op_threads())
+    interp.allocate_tensors()
+    in_idx = interp.get_input_details()[0]["index"]
+    out_idx = interp.get_output_details()[0]["index"]
+    lock = threading.Lock()
+
+    def infer(x: np.ndarray) -> np.ndarray:
+        with lock:
+            if tuple(interp.get_input_details()[0]["shape"]) != x.shape:
+                interp.resize_tensor_input(in_idx, x.shape, strict=False)
+                interp.allocate_tensors()
+            interp.set_tensor(in_idx, x)
+            interp.invoke()
+            return interp.get_tensor(out_idx).copy()
+
+    return infer
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 ARTIFACTS_DIR = os.path.join(BASE_DIR, "artifacts")
+# Packed scaler statistics (see scripts/pack_artifacts.py); replaces both .pkl
+# loads with one small file read when present.
+PARAMS_PATH = os.path.join(ARTIFACTS_DIR, "inference_params.npz")
+
+
+def _packed_params_fresh(scaler_paths) -> bool:
+    """
+    True when inference_params.npz exists and no scaler pickle is newer, i.e.
+    scripts/pack_artifacts.py has been re-run since the last retrain.
+    """
+    if not os.path.exists(PARAMS_PATH):
+        return False
+    packed_mtime = os.path.getmtime(PARAMS_PATH)
+    newer = [p for p in scaler_paths if os.path.exists(p) and os.path.getmtime(p) > packed_mtime]
+    if newer:
+        logger.warning(
+            "%s is older than %s; using the pickled scalers. Re-run scripts/pack_artifacts.py.",
+            PARAMS_PATH, ", ".join(newer),
+        )
+        return False
+    return True
 
 
 @lru_cache(maxsize=1)
@@ -29,13 +139,21 @@ def load_artifacts():
     motor_scaler_path = os.path.join(ARTIFACTS_DIR, "motor", "motor_scaler.pkl")
     secondary_scaler_path = os.path.join(ARTIFACTS_DIR, "secondary", "secondary_scaler.pkl")
 
+    packed = _packed_params_fresh([motor_scaler_path, secondary_scaler_path])
+
+    use_tflite = os.getenv("ML_TFLITE", "1") != "0"
+    tflite_paths = {
+        key: os.path.join(ARTIFACTS_DIR, key, f"{key}_model.tflite")
+        for key in ("motor", "secondary")
+    }
+    tflite = {key: use_tflite and os.path.exists(p) for key, p in tflite_paths.items()}
+
     missing = []
     for p in [
         schema_path,
-        motor_model_path,
-        secondary_model_path,
-        motor_scaler_path,
-        secondary_scaler_path,
+        *([] if tflite["motor"] else [motor_model_path]),
+        *([] if tflite["secondary"] else [secondary_model_path]),
+        *([] if packed else [motor_scaler_path, secondary_scaler_path]),
     ]:
         if not os.path.exists(p):
             missing.append(p)
@@ -52,20 +170,57 @@ def load_artifacts():
     window_length = int(schema.get("window_length", 2400))
     num_features = int(schema.get("num_features", len(feature_order)))
 
+    # The Keras models are only deserialised for whichever road type has no
+    # TFLite export in use; the interpreter needs nothing from them.
     keras = _lazy_import_keras()
-    motor_model = keras.models.load_model(motor_model_path, compile=False)
-    secondary_model = keras.models.load_model(secondary_model_path, compile=False)
+    input_shape = (window_length, len(feature_order))
+    models = {}
+    infer_fns = {}
+    for key, model_path in (("motor", motor_model_path), ("secondary", secondary_model_path)):
+        if tflite[key]:
+            models[key] = None
+            infer_fns[key] = _make_tflite_infer_fn(tflite_paths[key])
+        else:
+            models[key] = keras.models.load_model(model_path, compile=False)
+            infer_fns[key] = _make_infer_fn(models[key], input_shape)
 
-    motor_scaler = joblib.load(motor_scaler_path)
-    secondary_scaler = joblib.load(secondary_scaler_path)
+    # Only the fitted statistics are needed at inference time; applying them
+    # directly skips sklearn's per-call validation and dtype-coercion copy.
+    if packed:
+        with np.load(PARAMS_PATH) as z:
+            motor_mean, motor_inv_scale = z["motor_mean"], z["motor_inv_scale"]
+            secondary_mean, secondary_inv_scale = z["secondary_mean"], z["secondary_inv_scale"]
+    else:
+        motor_mean, motor_inv_scale = _scaler_params(joblib.load(motor_scaler_path))
+        secondary_mean, secondary_inv_scale = _scaler_params(joblib.load(secondary_scaler_path))
 
     return {
         "schema": schema,
         "feature_order": feature_order,
         "window_length": window_length,
         "num_features": num_features,
-        "motor_model": motor_model,
-        "secondary_model": secondary_model,
-        "motor_scaler": motor_scaler,
-        "secondary_scaler": secondary_scaler,
-    }
\ No newline at end of file
+        "motor_model": models["motor"],
+        "secondary_model": models["secondary"],
+        "motor_infer": infer_fns["motor"],
+        "secondary_infer": infer_fns["secondary"],
+        "motor_mean": motor_mean,
+        "motor_inv_scale": motor_inv_scale,
+        "secondary_mean": secondary_mean,
+        "secondary_inv_scale": secondary_inv_scale,
+    }
+
+def warmup(batch_sizes=(1,)) -> None:
+    """
+    Load artifacts and run a dummy forward pass per model and batch size so
+    the first real request doesn't pay for disk I/O and graph building.
+    """
+    art = load_artifacts()
+    shape = (art["window_length"], len(art["feature_order"]))
+
+    def _warm(key):
+        for b in batch_sizes:
+            art[f"{key}_infer"](np.zeros((b, *shape), dtype=np.float32))
+
+    # TF releases the GIL inside kernels, so both models trace/compile at once.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        list(ex.map(_warm, ("motor", "secondary")))
@@ -1,17 +1,117 @@
 # app/ml/predictor.py
 
-from typing import Dict, Any
+import os
+from typing import Any, Dict, Mapping
 import numpy as np
 import pandas as pd
 
-from .keras_runtime import load_artifacts
+from .batcher import MAX_BATCH, MAX_WAIT_S, InferenceBatcher
+from .keras_runtime import load_artifacts, warmup as _warmup_models
 from .feature_builder import make_windows
 
 
 LABELS = ["Aggressive", "Drowsy", "Normal"]
 
+# Indexed like LABELS: (base, span, score rises with confidence?)
+SCORE_TABLE = (
+    (35, 15, False),  # Aggressive
+    (20, 20, False),  # Drowsy
+    (80, 20, True),   # Normal
+)
+
+# Indexed like LABELS: (priority, title, message template)
+FEEDBACK_TABLE = (
+    ("high", "Harsh driving detected",
+     "Model detected aggressive patterns ({pct}% confidence). "
+     "Focus on smoother acceleration and braking."),
+    ("high", "Possible fatigue risk",
+     "Model detected drowsiness patterns ({pct}% confidence). "
+     "Consider taking a break."),
+    ("medium", "Good control",
+     "Model detected normal driving ({pct}% confidence). "
+     "Maintain consistency."),
+)
+
+
+# Batch sizes the model ever sees. XLA compiles (and TFLite re-allocates) per
+# input shape, so padding to a few buckets keeps that to a handful of shapes.
+# The small powers of two keep a single deduplicated session from paying for
+# dozens of zero windows.
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 96, 128)
+
+
+def _bucket_size(n: int) -> int:
+    for b in BATCH_BUCKETS:
+        if b >= n:
+            return b
+    return BATCH_BUCKETS[-1]
+
+
+def warmup() -> None:
+    """Startup hook: compile every bucketed batch shape for both models."""
+    _warmup_models(batch_sizes=BATCH_BUCKETS)
+
+
+def _run_model(model_key: str, X: np.ndarray) -> np.ndarray:
+    """Forward pass for one (possibly multi-session) batch of windows."""
+    infer = load_artifacts()[f"{model_key}_infer"]
+    # Larger batches go through in top-bucket chunks so no unwarmed shape
+    # ever reaches the model.
+    top = BATCH_BUCKETS[-1]
+    outs = []
+    for start in range(0, max(X.shape[0], 1), top):
+        chunk = X[start:start + top]
+        n = chunk.shape[0]
+        padded = np.zeros((_bucket_size(n), *X.shape[1:]), dtype=np.float32)
+        padded[:n] = chunk
+        outs.append(infer(padded)[:n])
+    return outs[0] if len(outs) == 1 else np.concatenate(outs, axis=0)
+
+
+# Concurrent requests for the same model share one forward pass.
+# ML_BATCH_MAX / ML_BATCH_WAIT_MS tune the coalescing window per deployment.
+_batcher = InferenceBatcher(
+    _run_model,
+    max_batch=int(os.getenv("ML_BATCH_MAX", MAX_BATCH)),
+    max_wait_s=float(os.getenv("ML_BATCH_WAIT_MS", MAX_WAIT_S * 1000)) / 1000,
+)
+
+
+# Ground-truth columns some CSVs carry; never fed to the model.
+_LABEL_COLS = frozenset(["behavior_label", "label", "target", "class"])
+
 
 def predict_from_dataframe(df: pd.DataFrame, road_type: str) -> Dict[str, Any]:
+    """Back-compat wrapper around predict_from_arrays."""
+    return predict_from_arrays({c: df[c].to_numpy() for c in df.columns}, road_type)
+
+
+def predict_from_arrays(cols: Mapping[str, np.ndarray], road_type: str) -> Dict[str, Any]:
+    """
+    Score one session given its raw signals as {column name: 1-D array}.
+    Columns outside the schema are ignored; missing ones are zero-filled.
+    """
+    feature_cols = load_artifacts()["feature_order"]
+
+    # ------------------------------------------------
+    # DROP LABEL COLUMNS (CRITICAL)
+    # STRICT FEATURE ORDER ENFORCEMENT
+    # ------------------------------------------------
+    # Build the (rows, features) float32 matrix in schema order in one pass;
+    # everything downstream stays FP32.
+    n_rows = len(next(iter(cols.values()))) if cols else 0
+    zeros = np.zeros(n_rows, dtype=np.float32)
+    mat = np.stack(
+        [
+            np.asarray(cols[c], dtype=np.float32) if c in cols and c not in _LABEL_COLS else zeros
+            for c in feature_cols
+        ],
+        axis=1,
+    )
+    return _predict_from_matrix(mat, road_type)
+
+
+def _predict_from_matrix(arr: np.ndarray, road_type: str) -> Dict[str, Any]:
 
     # ------------------------------------------------
     # LOAD MODELS + SCHEMA
@@ -24,33 +124,19 @@ def predict_from_dataframe(df: pd.DataFrame, road_type: str) -> Dict[str, Any]:
     road = (road_type or "").strip().lower()
     use_motor = road in ["motor", "motorway", "highway"]
 
-    model = art["motor_model"] if use_motor else art["secondary_model"]
-    scaler = art["motor_scaler"] if use_motor else art["secondary_scaler"]
-
-    # ------------------------------------------------
-    # DROP LABEL COLUMNS (CRITICAL)
-    # ------------------------------------------------
-    for drop_col in ["behavior_label", "label", "target", "class"]:
-        if drop_col in df.columns:
-            df = df.drop(columns=[drop_col])
-
-    # ------------------------------------------------
-    # STRICT FEATURE ORDER ENFORCEMENT
-    # ------------------------------------------------
-    for col in feature_cols:
-        if col not in df.columns:
-            df[col] = 0.0
-
-    df = df[feature_cols]
+    model_key = "motor" if use_motor else "secondary"
+    mean = art[f"{model_key}_mean"]
+    inv_scale = art[f"{model_key}_inv_scale"]
 
     # ------------------------------------------------
     # CREATE WINDOWS (uses correct stride internally)
     # ------------------------------------------------
     X, _ = make_windows(
-        df,
+        arr,
         feature_cols,
         window_size=window_size,
-        road_type=road_type
+        road_type=road_type,
+        return_idxs=False,
     )
 
     if X.shape[0] == 0:
@@ -59,21 +145,41 @@ def predict_from_dataframe(df: pd.DataFrame, road_type: str) -> Dict[str, Any]:
         )
 
     # ------------------------------------------------
-    # SCALE EXACTLY LIKE TRAINING
+    # DEDUP IDENTICAL WINDOWS
     # ------------------------------------------------
+    # Idle / constant-speed stretches produce byte-identical windows; run
+    # the model once per distinct window and weight its output by count.
+    #
+    # ascontiguousarray is a no-op for make_windows' stacked output; it
+    # guarantees the flatten below is a view rather than a silent copy.
+    X = np.ascontiguousarray(X, dtype=np.float32)
     n, t, f = X.shape
+    flat = X.reshape(n, t * f)
+    # Compare each window as one opaque byte string: np.unique(axis=0) would
+    # build a structured dtype with t * f fields and cost ~0.5 s per call.
+    rows = flat.view(np.dtype((np.void, flat.itemsize * t * f))).reshape(-1)
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    X_unique = flat[first].reshape(-1, t, f)
+    inverse = inverse.reshape(-1)
 
-    X2 = X.reshape(n * t, f)
-    X2 = scaler.transform(X2)
-    X_scaled = X2.reshape(n, t, f)
+    # ------------------------------------------------
+    # SCALE EXACTLY LIKE TRAINING
+    # ------------------------------------------------
+    # (f,) stats broadcast over windows and timesteps; X_unique is a fresh
+    # array from the fancy index above, so normalise it in place.
+    X_scaled = X_unique
+    X_scaled -= mean
+    X_scaled *= inv_scale
 
     # ------------------------------------------------
     # PREDICT
     # ------------------------------------------------
-    probs = model.predict(X_scaled, verbose=0)
+    unique_probs = _batcher.submit(X_scaled, model_key)
 
-    # Average probabilities across all windows
-    mean_probs = probs.mean(axis=0)
+    # Average probabilities across all windows: each distinct window weighted
+    # by how often it occurred, without materialising the (n, 3) scatter.
+    counts = np.bincount(inverse, minlength=unique_probs.shape[0]).astype(np.float32)
+    mean_probs = counts @ unique_probs / n
 
     pred_idx = int(np.argmax(mean_probs))
     confidence = float(mean_probs[pred_idx])
@@ -82,15 +188,8 @@ def predict_from_dataframe(df: pd.DataFrame, road_type: str) -> Dict[str, Any]:
     # ------------------------------------------------
     # OVERALL SCORE LOGIC
     # ------------------------------------------------
-    if label == "Normal":
-        overall = int(80 + confidence * 20)
-
-    elif label == "Aggressive":
-        overall = int(35 + (1 - confidence) * 15)
-
-    else:  # Drowsy
-        overall = int(20 + (1 - confidence) * 20)
-
+    base, span, rewards_confidence = SCORE_TABLE[pred_idx]
+    overall = int(base + (confidence if rewards_confidence else 1 - confidence) * span)
     overall = max(0, min(100, overall))
 
     badge = (
@@ -104,38 +203,12 @@ def predict_from_dataframe(df: pd.DataFrame, road_type: str) -> Dict[str, Any]:
     # ------------------------------------------------
     # AI FEEDBACK
     # ------------------------------------------------
-    if label == "Aggressive":
-        feedback = [{
-            "priority": "high",
-            "title": "Harsh driving detected",
-            "message": (
-                f"Model detected aggressive patterns "
-                f"({round(confidence * 100)}% confidence). "
-                "Focus on smoother acceleration and braking."
-            )
-        }]
-
-    elif label == "Drowsy":
-        feedback = [{
-            "priority": "high",
-            "title": "Possible fatigue risk",
-            "message": (
-                f"Model detected drowsiness patterns "
-                f"({round(confidence * 100)}% confidence). "
-                "Consider taking a break."
-            )
-        }]
-
-    else:
-        feedback = [{
-            "priority": "medium",
-            "title": "Good control",
-            "message": (
-                f"Model detected normal driving "
-                f"({round(confidence * 100)}% confidence). "
-                "Maintain consistency."
-            )
-        }]
+    priority, title, message = FEEDBACK_TABLE[pred_idx]
+    feedback = [{
+        "priority": priority,
+        "title": title,
+        "message": message.format(pct=round(confidence * 100)),
+    }]
 
     # ------------------------------------------------
     # FINAL RESPONSE
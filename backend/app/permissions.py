@@ -1,3 +1,6 @@
+import threading
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
@@ -5,12 +8,23 @@ from app.auth import decode_token
 from app.database import users_col
 
 try:
-    from jose import JWTError
+    from jwt import PyJWTError as JWTError
 except Exception:
     JWTError = Exception
 
 bearer = HTTPBearer(auto_error=True)
 
+# user_id -> user doc (without password_hash). Saves a Mongo round trip on
+# every authenticated request; writes to users_col must call invalidate_user().
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_user_cache_lock = threading.Lock()
+
+
+def invalidate_user(user_id: str) -> None:
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
 def get_current_user(creds: HTTPAuthorizationCredentials = Depends(bearer)) -> dict:
     token = creds.credentials
     try:
@@ -22,13 +36,19 @@ def get_current_user(creds: HTTPAuthorizationCredentials = Depends(bearer)) -> d
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    # ✅ your system uses user_id field (uuid hex)
-    user = users_col.find_one({"user_id": user_id})
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    with _user_cache_lock:
+        user = _user_cache.get(user_id)
+
+    if user is None:
+        # ✅ your system uses user_id field (uuid hex)
+        user = users_col.find_one({"user_id": user_id}, {"password_hash": 0})
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        with _user_cache_lock:
+            _user_cache[user_id] = user
 
-    user.pop("password_hash", None)
-    return user
+    # Handlers get their own copy so nothing leaks back into the cache.
+    return dict(user)
 
 def require_role(*roles: str):
     def _dep(user: dict = Depends(get_current_user)) -> dict:
@@ -1,12 +1,29 @@
+import secrets
 from datetime import datetime
+from typing import Iterable, List
+
+import orjson
 from bson import ObjectId
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# orjson encodes datetime and numpy natively; ObjectId goes through _orjson_default.
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
 
 
 def now_utc() -> datetime:
     return datetime.utcnow()
 
 
+def new_ids(n: int = 1) -> List[str]:
+    """
+    n random 32-char hex ids (same shape as uuid4().hex) from a single
+    urandom draw, instead of one getrandom syscall per uuid4().
+    """
+    b = secrets.token_bytes(16 * n)
+    return [b[i * 16:(i + 1) * 16].hex() for i in range(n)]
+
+
 def oid(x: str) -> ObjectId:
     try:
         return ObjectId(x)
@@ -14,34 +31,38 @@ def oid(x: str) -> ObjectId:
         raise HTTPException(status_code=400, detail="Invalid id")
 
 
-def to_jsonable(obj):
-    """
-    Converts MongoDB docs (ObjectId, datetime, numpy) into JSON-safe values.
-    Works for dicts, lists, and nested structures.
-    """
+def _orjson_default(obj):
     if isinstance(obj, ObjectId):
         return str(obj)
-    if isinstance(obj, datetime):
-        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
 
-    if isinstance(obj, list):
-        return [to_jsonable(x) for x in obj]
 
-    if isinstance(obj, dict):
-        return {k: to_jsonable(v) for k, v in obj.items()}
+def dumps_json(obj) -> bytes:
+    """Serialises Mongo docs straight to JSON bytes in a single orjson pass."""
+    return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTS)
 
-    # Handle numpy/pandas types that may leak from ML pipeline
-    try:
-        import numpy as np
-        if isinstance(obj, (np.integer,)):
-            return int(obj)
-        if isinstance(obj, (np.floating,)):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if isinstance(obj, np.bool_):
-            return bool(obj)
-    except ImportError:
-        pass
-
-    return obj
+
+class MongoJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by orjson. Return it directly from a route so FastAPI
+    skips its jsonable_encoder pass; raw Mongo docs can be passed as-is.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+
+def stream_json_array(docs: Iterable) -> StreamingResponse:
+    """
+    Streams an iterable of Mongo docs (e.g. a cursor) as a JSON array,
+    serialising one document at a time instead of materialising the list.
+    """
+    def _gen():
+        yield b"["
+        for i, doc in enumerate(docs):
+            if i:
+                yield b","
+            yield dumps_json(doc)
+        yield b"]"
+
+    return StreamingResponse(_gen(), media_type="application/json")
@@ -5,15 +5,13 @@ Also owns the root / and /health probes.
 """
 from __future__ import annotations
 
-import uuid
-
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.auth import create_access_token, hash_password, verify_password
 from app.database import institute_codes_col, instructor_profiles_col, users_col
 from app.models import ChangePasswordRequest, LoginRequest, RegisterRequest, TokenResponse, UserPublic
-from app.permissions import get_current_user
-from app.utils import now_utc, to_jsonable
+from app.permissions import get_current_user, invalidate_user
+from app.utils import MongoJSONResponse, new_ids, now_utc
 
 router = APIRouter(tags=["Auth"])
 
@@ -43,7 +41,9 @@ def register(body: RegisterRequest):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     role = body.role.strip().lower()
-    user_id = uuid.uuid4().hex
+    # Both ids come from one RNG draw; instructor_id is only kept for instructors.
+    user_id, new_instructor_id = new_ids(2)
+    now = now_utc()
     instructor_id = None
 
     if role == "instructor":
@@ -56,7 +56,7 @@ def register(body: RegisterRequest):
         if code_doc.get("used") is True:
             raise HTTPException(status_code=400, detail="Institute code already used")
 
-        instructor_id = uuid.uuid4().hex
+        instructor_id = new_instructor_id
         doc = {
             "user_id": user_id,
             "role": "instructor",
@@ -64,13 +64,13 @@ def register(body: RegisterRequest):
             "email": email,
             "password_hash": hash_password(body.password),
             "instructor_id": instructor_id,
-            "created_at": now_utc(),
+            "created_at": now,
         }
         users_col.insert_one(doc)
 
         institute_codes_col.update_one(
             {"_id": code_doc["_id"], "used": {"$ne": True}},
-            {"$set": {"used": True, "used_by": user_id, "used_at": now_utc()}},
+            {"$set": {"used": True, "used_by": user_id, "used_at": now}},
         )
 
         instructor_profiles_col.insert_one({
@@ -90,7 +90,7 @@ def register(body: RegisterRequest):
             "total_sessions": 0,
             "verified": False,
             "active": True,
-            "created_at": now_utc(),
+            "created_at": now,
         })
     else:
         doc = {
@@ -99,7 +99,7 @@ def register(body: RegisterRequest):
             "name": body.name.strip(),
             "email": email,
             "password_hash": hash_password(body.password),
-            "created_at": now_utc(),
+            "created_at": now,
         }
         users_col.insert_one(doc)
 
@@ -165,9 +165,10 @@ def change_password(body: ChangePasswordRequest, current_user=Depends(get_curren
         {"user_id": current_user["user_id"]},
         {"$set": {"password_hash": hash_password(body.new_password)}},
     )
+    invalidate_user(current_user["user_id"])
     return {"status": "ok", "message": "Password changed successfully"}
 
 
 @router.get("/auth/me")
 def me(current_user=Depends(get_current_user)):
-    return to_jsonable(current_user)
+    return MongoJSONResponse(current_user)
@@ -11,7 +11,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.database import availability_col, bookings_col, users_col
 from app.models import BookSlotRequest
 from app.permissions import get_current_user, require_role
-from app.utils import now_utc, to_jsonable
+from app.utils import MongoJSONResponse, now_utc
 
 router = APIRouter(tags=["Bookings"])
 
@@ -79,7 +79,7 @@ def my_bookings(current_user=Depends(get_current_user)):
             trainee = users_col.find_one({"user_id": b.get("trainee_id")}, {"name": 1})
             b["trainee_name"] = trainee.get("name", "Unknown") if trainee else "Unknown"
 
-    return to_jsonable(bookings)
+    return MongoJSONResponse(bookings)
 
 
 @router.delete("/bookings/{booking_id}")
@@ -14,17 +14,21 @@ from app.database import (
     settings_col, users_col,
 )
 from app.permissions import get_current_user, require_role
-from app.utils import now_utc, to_jsonable
+from app.utils import MongoJSONResponse, now_utc
 
 router = APIRouter(tags=["Dashboard"])
 
+# Dashboards only summarise; the per-window arrays and dataset refs stay in Mongo.
+_SESSION_SUMMARY_FIELDS = {"dataset_used": 0}
+_RESULT_SUMMARY_FIELDS = {"windows": 0, "dataset_used": 0}
+
 
 @router.get("/dashboard/trainee")
 def trainee_dashboard(current_user=Depends(require_role("trainee"))):
     trainee_id = current_user["user_id"]
 
     all_sessions = list(
-        sessions_col.find({"trainee_id": trainee_id}).sort("created_at", -1)
+        sessions_col.find({"trainee_id": trainee_id}, _SESSION_SUMMARY_FIELDS).sort("created_at", -1)
     )
     completed_sessions = [s for s in all_sessions if s.get("status") == "completed"]
 
@@ -64,7 +68,7 @@ def trainee_dashboard(current_user=Depends(require_role("trainee"))):
     upcoming_session = upcoming_sessions_list[0] if upcoming_sessions_list else None
 
     recent_results = list(
-        results_col.find({"trainee_id": trainee_id}).sort("created_at", -1).limit(10)
+        results_col.find({"trainee_id": trainee_id}, _RESULT_SUMMARY_FIELDS).sort("created_at", -1).limit(10)
     )
 
     latest = recent_results[0] if recent_results else None
@@ -148,18 +152,18 @@ def trainee_dashboard(current_user=Depends(require_role("trainee"))):
     else:
         goal_text = "Complete your first session to start tracking progress."
 
-    return {
+    return MongoJSONResponse({
         "welcome":              {"name": current_user.get("name", ""), "badge": badge},
         "progress":             {"sessions_completed": completed_count, "target_sessions": target, "current_score": current_score, "goal_text": goal_text},
         "upcoming_session":     upcoming_session,
         "upcoming_sessions":    upcoming_sessions_list,
-        "recent_reports":       to_jsonable(recent_reports),
-        "recent_sessions":      to_jsonable(all_sessions[:5]),
-        "ai_feedback":          to_jsonable(ai_feedback),
-        "instructor_comments":  to_jsonable(instructor_comments),
-        "achievements":         to_jsonable(achievements),
-        "milestones":           to_jsonable(milestones),
-    }
+        "recent_reports":       recent_reports,
+        "recent_sessions":      all_sessions[:5],
+        "ai_feedback":          ai_feedback,
+        "instructor_comments":  instructor_comments,
+        "achievements":         achievements,
+        "milestones":           milestones,
+    })
 
 
 @router.get("/dashboard/instructor")
@@ -167,7 +171,7 @@ def instructor_dashboard(current_user=Depends(require_role("instructor"))):
     instructor_id = current_user["instructor_id"]
 
     recent_sessions = list(
-        sessions_col.find({"instructor_id": instructor_id}).sort("created_at", -1).limit(20)
+        sessions_col.find({"instructor_id": instructor_id}, _SESSION_SUMMARY_FIELDS).sort("created_at", -1).limit(20)
     )
 
     trainee_ids = list(set(
@@ -183,11 +187,15 @@ def instructor_dashboard(current_user=Depends(require_role("instructor"))):
         )
     )
 
-    latest_results = list(
-        results_col.find({"instructor_id": instructor_id}).sort("created_at", -1).limit(50)
-    )
-    scores = [float(r["analysis"]["overall"]) for r in latest_results if r.get("analysis", {}).get("overall")]
-    avg_score = int(sum(scores) / len(scores)) if scores else 0
+    # Average of the latest 50 non-zero scores, computed server-side.
+    score_stats = next(results_col.aggregate([
+        {"$match": {"instructor_id": instructor_id}},
+        {"$sort": {"created_at": -1}},
+        {"$limit": 50},
+        {"$match": {"analysis.overall": {"$nin": [0, None]}}},
+        {"$group": {"_id": None, "avg": {"$avg": "$analysis.overall"}}},
+    ]), None)
+    avg_score = int(score_stats["avg"]) if score_stats else 0
 
     upcoming = list(
         bookings_col.find(
@@ -206,7 +214,7 @@ def instructor_dashboard(current_user=Depends(require_role("instructor"))):
         sort=[("started_at", -1)],
     )
 
-    return {
+    return MongoJSONResponse({
         "summary": {
             "total_learners": len(learners),
             "avg_score": avg_score,
@@ -214,12 +222,12 @@ def instructor_dashboard(current_user=Depends(require_role("instructor"))):
             "rating": profile.get("rating", 0) if profile else 0,
             "total_reviews": profile.get("total_reviews", 0) if profile else 0,
         },
-        "learners": to_jsonable(learners),
-        "recent_sessions": to_jsonable(recent_sessions),
-        "upcoming_bookings": to_jsonable(upcoming),
-        "active_session": to_jsonable(active) if active else None,
-        "profile": to_jsonable(profile) if profile else None,
-    }
+        "learners": learners,
+        "recent_sessions": recent_sessions,
+        "upcoming_bookings": upcoming,
+        "active_session": active,
+        "profile": profile,
+    })
 
 
 @router.get("/instructor/student/{trainee_id}/history")
@@ -238,22 +246,22 @@ def student_history_for_instructor(trainee_id: str, current_user=Depends(require
         raise HTTPException(status_code=404, detail="Student not found")
 
     sessions = list(
-        sessions_col.find({"trainee_id": trainee_id, "status": "completed"})
+        sessions_col.find({"trainee_id": trainee_id, "status": "completed"}, _SESSION_SUMMARY_FIELDS)
         .sort("created_at", -1)
         .limit(50)
     )
 
     results = list(
-        results_col.find({"trainee_id": trainee_id})
+        results_col.find({"trainee_id": trainee_id}, _RESULT_SUMMARY_FIELDS)
         .sort("created_at", -1)
         .limit(50)
     )
 
-    return {
-        "student": to_jsonable(student),
-        "sessions": to_jsonable(sessions),
-        "results": to_jsonable(results),
-    }
+    return MongoJSONResponse({
+        "student": student,
+        "sessions": sessions,
+        "results": results,
+    })
 
 
 @router.get("/instructor/learners")
@@ -274,4 +282,4 @@ def instructor_learners(current_user=Depends(require_role("instructor"))):
         )
     )
 
-    return to_jsonable(learners)
+    return MongoJSONResponse(learners)
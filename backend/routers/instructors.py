@@ -13,7 +13,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.database import availability_col, instructor_profiles_col, reviews_col
 from app.models import AddSlotsRequest
 from app.permissions import get_current_user, require_role
-from app.utils import now_utc, to_jsonable
+from app.utils import MongoJSONResponse, now_utc
 
 router = APIRouter(tags=["Instructors"])
 
@@ -47,7 +47,7 @@ def list_instructors(
         .limit(50)
     )
 
-    return to_jsonable(profiles)
+    return MongoJSONResponse(profiles)
 
 
 @router.get("/instructors/{instructor_id}")
@@ -65,10 +65,10 @@ def get_instructor_profile(instructor_id: str, current_user=Depends(get_current_
         .limit(10)
     )
 
-    return {
-        "profile": to_jsonable(profile),
-        "reviews": to_jsonable(recent_reviews),
-    }
+    return MongoJSONResponse({
+        "profile": profile,
+        "reviews": recent_reviews,
+    })
 
 
 # ── Availability ──────────────────────────────────────────────────────────────
@@ -90,8 +90,9 @@ def get_instructor_availability(
         query.setdefault("date", {})["$lte"] = date_to
 
     if not date_from and not date_to:
-        today = now_utc().strftime("%Y-%m-%d")
-        future = (now_utc() + timedelta(days=14)).strftime("%Y-%m-%d")
+        now = now_utc()
+        today = now.strftime("%Y-%m-%d")
+        future = (now + timedelta(days=14)).strftime("%Y-%m-%d")
         query["date"] = {"$gte": today, "$lte": future}
 
     slots = list(
@@ -99,7 +100,7 @@ def get_instructor_availability(
         .sort([("date", 1), ("start_time", 1)])
     )
 
-    return to_jsonable(slots)
+    return MongoJSONResponse(slots)
 
 
 @router.post("/availability")
@@ -107,6 +108,7 @@ def add_availability_slots(body: AddSlotsRequest, current_user=Depends(require_r
     """Instructor publishes time slots."""
     instructor_id = current_user["instructor_id"]
     created = []
+    now = now_utc()
 
     for slot in body.slots:
         date_str = slot.get("date")
@@ -132,7 +134,7 @@ def add_availability_slots(body: AddSlotsRequest, current_user=Depends(require_r
             "duration_min": duration,
             "status": "open",
             "booked_by": None,
-            "created_at": now_utc(),
+            "created_at": now,
         }
         availability_col.insert_one(doc)
         created.append(slot_id)
@@ -153,7 +155,7 @@ def my_availability(current_user=Depends(require_role("instructor"))):
         ).sort([("date", 1), ("start_time", 1)])
     )
 
-    return to_jsonable(slots)
+    return MongoJSONResponse(slots)
 
 
 @router.delete("/availability/{slot_id}")
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.database import instructor_profiles_col, settings_col
 from app.models import SettingsUpdate
 from app.permissions import get_current_user, require_role
-from app.utils import to_jsonable
+from app.utils import MongoJSONResponse
 
 router = APIRouter(tags=["Profile & Settings"])
 
@@ -19,7 +19,7 @@ def get_my_instructor_profile(current_user=Depends(require_role("instructor"))):
     profile = instructor_profiles_col.find_one(
         {"instructor_id": current_user["instructor_id"]}, {"_id": 0}
     )
-    return to_jsonable(profile) if profile else {}
+    return MongoJSONResponse(profile or {})
 
 
 @router.patch("/instructor/profile/me")
@@ -43,7 +43,9 @@ def update_my_instructor_profile(body: dict, current_user=Depends(require_role("
 @router.get("/settings/me")
 def get_settings(current_user=Depends(get_current_user)):
     s = settings_col.find_one({"user_id": current_user["user_id"]}, {"_id": 0})
-    return s or {"user_id": current_user["user_id"], "profile": {}, "notifications": {}, "preferences": {}}
+    return MongoJSONResponse(
+        s or {"user_id": current_user["user_id"], "profile": {}, "notifications": {}, "preferences": {}}
+    )
 
 
 @router.patch("/settings/me")
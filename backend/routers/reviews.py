@@ -11,7 +11,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.database import instructor_profiles_col, reviews_col, sessions_col
 from app.models import ReviewCreateRequest
 from app.permissions import get_current_user, require_role
-from app.utils import now_utc, to_jsonable
+from app.utils import MongoJSONResponse, now_utc
 
 router = APIRouter(tags=["Reviews"])
 
@@ -65,4 +65,4 @@ def get_reviews(instructor_id: str, current_user=Depends(get_current_user)):
         .sort("created_at", -1)
         .limit(50)
     )
-    return to_jsonable(revs)
+    return MongoJSONResponse(revs)
@@ -9,7 +9,7 @@ import json
 import os
 import sys
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException
@@ -21,10 +21,21 @@ from app.datasets import pick_csv_for_simulation, resolve_datasets_root
 from app.ml.predictor import predict_from_dataframe
 from app.models import GenerateFeedbackRequest, SessionEndRequest, SessionNoteUpdate, SessionStartRequest
 from app.permissions import get_current_user, require_role
-from app.utils import now_utc, to_jsonable
+from app.utils import MongoJSONResponse, now_utc, stream_json_array
 
 router = APIRouter(tags=["Sessions"])
 
+# List views never render the per-window arrays; leave them on the server.
+_NO_WINDOWS = {"windows": 0}
+
+# Records are capped at this many docs; fetch them in a single cursor batch
+# instead of the default 101-doc first batch + getMore.
+_RECORDS_LIMIT = 200
+
+# A session left in "ending" this long (worker crash / restart mid-inference)
+# is treated as active again by the active-session and end-session queries.
+_ENDING_STALE_AFTER = timedelta(minutes=5)
+
 # Path to KNN ML source (same relative path works from routers/ directory)
 _ML_SRC = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "ml-model", "src")
@@ -45,14 +56,21 @@ def my_reports(current_user=Depends(require_role("trainee"))):
 
     sessions = list(
         sessions_col.find(
-            {"trainee_id": trainee_id, "status": "completed"}
+            {"trainee_id": trainee_id, "status": "completed"},
+            {"dataset_used": 0, "instructor_notes": 0},
         ).sort("created_at", -1).limit(50)
     )
 
     session_ids = [s["session_id"] for s in sessions]
     results = {
         r["session_id"]: r
-        for r in results_col.find({"session_id": {"$in": session_ids}})
+        for r in results_col.find(
+            {"session_id": {"$in": session_ids}},
+            {
+                "_id": 0, "session_id": 1, "road_type": 1, "performance_score": 1,
+                "analysis.overall": 1, "window_summary": 1, "windows.predicted_label": 1,
+            },
+        )
     }
     # report_ready per session: True whenever any result exists (False only for sessions with no analysis yet)
     report_ready_map = {sid: True for sid in results}
@@ -106,7 +124,7 @@ def my_reports(current_user=Depends(require_role("trainee"))):
             "report_ready": report_ready_map.get(s["session_id"], False) or bool(s.get("performance_score")) or s.get("status") == "completed",
         })
 
-    return {"sessions": to_jsonable(out)}
+    return MongoJSONResponse({"sessions": out})
 
 
 # ── Session list ──────────────────────────────────────────────────────────────
@@ -116,14 +134,21 @@ def list_sessions(current_user=Depends(get_current_user)):
     if current_user["role"] == "instructor":
         instructor_id = current_user["instructor_id"]
 
-        sessions = list(sessions_col.find({"instructor_id": instructor_id}).sort("created_at", -1))
+        sessions = list(
+            sessions_col.find({"instructor_id": instructor_id}, {"dataset_used": 0}, batch_size=500)
+            .sort("created_at", -1)
+        )
         started_booking_ids = {s.get("booking_id") for s in sessions if s.get("booking_id")}
 
-        pending_bookings = bookings_col.find({
-            "instructor_id": instructor_id,
-            "status": "confirmed",
-            "booking_id": {"$nin": list(started_booking_ids)},
-        })
+        pending_bookings = bookings_col.find(
+            {
+                "instructor_id": instructor_id,
+                "status": "confirmed",
+                "booking_id": {"$nin": list(started_booking_ids)},
+            },
+            {"_id": 0, "booking_id": 1, "trainee_id": 1, "trainee_name": 1,
+             "slot_date": 1, "start_time": 1, "created_at": 1},
+        )
         for b in pending_bookings:
             slot_date = b.get("slot_date", "")
             start_time = b.get("start_time", "00:00")
@@ -147,21 +172,38 @@ def list_sessions(current_user=Depends(get_current_user)):
             })
 
         sessions.sort(key=lambda s: str(s.get("scheduled_at") or s.get("created_at") or ""), reverse=True)
-        return to_jsonable(sessions)
+        return MongoJSONResponse(sessions)
     else:
-        cur = sessions_col.find({"trainee_id": current_user["user_id"]}).sort("created_at", -1)
-        return to_jsonable(list(cur))
+        cur = sessions_col.find(
+            {"trainee_id": current_user["user_id"]}, {"dataset_used": 0}, batch_size=500
+        ).sort("created_at", -1)
+        return stream_json_array(cur)
 
 
 # ── Active session ────────────────────────────────────────────────────────────
 
+def _stale_ending_filter() -> dict:
+    """Sessions stuck in "ending" past _ENDING_STALE_AFTER (or from before ending_since existed)."""
+    return {
+        "status": "ending",
+        "$or": [
+            {"ending_since": {"$lt": now_utc() - _ENDING_STALE_AFTER}},
+            {"ending_since": None},
+        ],
+    }
+
+
 @router.get("/sessions/active")
 def get_active_session(current_user=Depends(require_role("instructor"))):
+    # An abandoned "ending" claim still counts as active; end_session takes it over.
     s = sessions_col.find_one(
-        {"instructor_id": current_user["instructor_id"], "status": "active"},
+        {
+            "instructor_id": current_user["instructor_id"],
+            "$or": [{"status": "active"}, _stale_ending_filter()],
+        },
         sort=[("started_at", -1)],
     )
-    return {"active": to_jsonable(s) if s else None}
+    return MongoJSONResponse({"active": s})
 
 
 # ── Timeline ──────────────────────────────────────────────────────────────────
@@ -182,6 +224,7 @@ def session_timeline(session_id: str, current_user=Depends(get_current_user)):
 
     result = results_col.find_one(
         {"session_id": session_id},
+        {"_id": 0, "windows": 1, "road_type": 1},
         sort=[("created_at", -1)]
     )
 
@@ -208,7 +251,7 @@ def session_timeline(session_id: str, current_user=Depends(get_current_user)):
             "is_flagged": w.get("predicted_label", "Normal") != "Normal",
         })
 
-    return to_jsonable({
+    return MongoJSONResponse({
         "session_id": session_id,
         "road_type": result.get("road_type", session.get("road_type", "Unknown")),
         "total_windows": len(enriched),
@@ -280,7 +323,7 @@ def session_report(session_id: str, current_user=Depends(get_current_user)):
         }
         ai_feedback = result.get("ai_feedback") or []
 
-    return to_jsonable({
+    return MongoJSONResponse({
         "report_ready": report_ready,
         "session_summary": {
             "date": date_str,
@@ -329,6 +372,7 @@ def generate_session_feedback(session_id: str, body: GenerateFeedbackRequest, cu
     ml_result = run_full_knn_pipeline(sensor_json)
     summary = ml_result["session_summary"]
     ml_windows = ml_result["windows"]
+    now = now_utc()
 
     results_col.update_one(
         {"session_id": session_id},
@@ -340,7 +384,7 @@ def generate_session_feedback(session_id: str, body: GenerateFeedbackRequest, cu
             "road_type": rt,
             "session_summary": summary,
             "windows": ml_windows,
-            "created_at": now_utc(),
+            "created_at": now,
         }},
         upsert=True,
     )
@@ -357,7 +401,7 @@ def generate_session_feedback(session_id: str, body: GenerateFeedbackRequest, cu
             "total_alerts":       summary.get("total_alerts"),
             "window_summary":     summary.get("window_summary"),
             "instructor_notes":   body.instructor_notes,
-            "processed_at":       now_utc(),
+            "processed_at":       now,
         }},
     )
 
@@ -373,56 +417,98 @@ def generate_session_feedback(session_id: str, body: GenerateFeedbackRequest, cu
     }
 
 
+def _raise_claim_error(col, query: dict, instructor_id: str, *, not_found: str, bad_state: str) -> None:
+    """A guarded find_one_and_update matched nothing — report which check failed."""
+    doc = col.find_one(query, {"instructor_id": 1})
+    if not doc:
+        raise HTTPException(status_code=404, detail=not_found)
+    if doc.get("instructor_id") != instructor_id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    raise HTTPException(status_code=400, detail=bad_state)
+
+
+def _run_session_inference(session: dict) -> dict:
+    road_type = (session.get("road_type") or "secondary").strip().lower()
+    dataset_used = session.get("dataset_used")
+
+    if not dataset_used or "rel_path" not in dataset_used:
+        raise HTTPException(status_code=400, detail="No dataset stored for this session")
+
+    root = resolve_datasets_root()
+    csv_path = (root / dataset_used["rel_path"]).resolve()
+
+    if not csv_path.exists():
+        raise HTTPException(status_code=500, detail="Stored dataset file not found")
+
+    df = pd.read_csv(csv_path)
+
+    try:
+        return predict_from_dataframe(df, road_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"ML inference failed: {str(e)}")
+
+
 # ── Start session ─────────────────────────────────────────────────────────────
 
 @router.post("/sessions/{booking_id}/start")
 def start_session(booking_id: str, body: SessionStartRequest, current_user=Depends(require_role("instructor"))):
     """Instructor starts a session from a confirmed booking."""
-    booking = bookings_col.find_one({"booking_id": booking_id})
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    if booking.get("instructor_id") != current_user["instructor_id"]:
-        raise HTTPException(status_code=403, detail="Forbidden")
-    if booking.get("status") != "confirmed":
-        raise HTTPException(status_code=400, detail="Booking not in confirmed state")
+    session_id = uuid.uuid4().hex
+    road_type = body.road_type.strip().title()  # "Motorway" or "Secondary"
 
-    sessions_col.update_many(
-        {"instructor_id": current_user["instructor_id"], "status": "active"},
-        {"$set": {"status": "scheduled"}},
+    # Check-and-transition in one round trip; also stops a double start.
+    booking = bookings_col.find_one_and_update(
+        {"booking_id": booking_id, "instructor_id": current_user["instructor_id"], "status": "confirmed"},
+        {"$set": {"session_id": session_id, "status": "in_progress"}},
+        projection={"trainee_id": 1},
     )
+    if not booking:
+        _raise_claim_error(
+            bookings_col, {"booking_id": booking_id}, current_user["instructor_id"],
+            not_found="Booking not found", bad_state="Booking not in confirmed state",
+        )
 
-    session_id = uuid.uuid4().hex
-    road_type = body.road_type.strip().title()  # "Motorway" or "Secondary"
-    chosen = pick_csv_for_simulation(road_type.lower())
-    root = resolve_datasets_root()
-    used = {
-        "csv": chosen.name,
-        "rel_path": str(chosen.relative_to(root)) if chosen.is_relative_to(root) else str(chosen),
-    }
+    try:
+        # Only a successful claim advances the dataset round-robin cursor.
+        chosen = pick_csv_for_simulation(road_type.lower())
+        root = resolve_datasets_root()
+        used = {
+            "csv": chosen.name,
+            "rel_path": str(chosen.relative_to(root)) if chosen.is_relative_to(root) else str(chosen),
+        }
 
-    from app.database import users_col  # noqa: PLC0415
-    trainee = users_col.find_one({"user_id": booking["trainee_id"]}, {"name": 1})
+        from app.database import users_col  # noqa: PLC0415
+        trainee = users_col.find_one({"user_id": booking["trainee_id"]}, {"name": 1})
+        now = now_utc()
 
-    sessions_col.insert_one({
-        "session_id": session_id,
-        "booking_id": booking_id,
-        "instructor_id": current_user["instructor_id"],
-        "instructor_name": current_user.get("name", ""),
-        "trainee_id": booking["trainee_id"],
-        "trainee_name": trainee.get("name", "Unknown") if trainee else "Unknown",
-        "status": "active",
-        "road_type": road_type,
-        "dataset_used": used,
-        "created_at": now_utc(),
-        "started_at": now_utc(),
-        "ended_at": None,
-        "instructor_notes": "",
-    })
+        sessions_col.insert_one({
+            "session_id": session_id,
+            "booking_id": booking_id,
+            "instructor_id": current_user["instructor_id"],
+            "instructor_name": current_user.get("name", ""),
+            "trainee_id": booking["trainee_id"],
+            "trainee_name": trainee.get("name", "Unknown") if trainee else "Unknown",
+            "status": "active",
+            "road_type": road_type,
+            "dataset_used": used,
+            "created_at": now,
+            "started_at": now,
+            "ended_at": None,
+            "instructor_notes": "",
+        })
 
-    bookings_col.update_one(
-        {"booking_id": booking_id},
-        {"$set": {"session_id": session_id, "status": "in_progress"}},
-    )
+        # Only once the new session exists: demote any other active one.
+        sessions_col.update_many(
+            {"instructor_id": current_user["instructor_id"], "status": "active", "session_id": {"$ne": session_id}},
+            {"$set": {"status": "scheduled"}},
+        )
+    except Exception:
+        # Release the booking so the start can be retried.
+        bookings_col.update_one(
+            {"booking_id": booking_id, "session_id": session_id, "status": "in_progress"},
+            {"$set": {"session_id": None, "status": "confirmed"}},
+        )
+        raise
 
     return {"status": "ok", "session_id": session_id, "booking_id": booking_id}
 
@@ -431,32 +517,32 @@ def start_session(booking_id: str, body: SessionStartRequest, current_user=Depen
 
 @router.post("/sessions/{session_id}/end")
 def end_session(session_id: str, body: SessionEndRequest, current_user=Depends(require_role("instructor"))):
-    session = sessions_col.find_one({"session_id": session_id})
+    # Claim the session (active -> ending) in one round trip so a concurrent
+    # second "end" can't run inference and write a duplicate result. A stale
+    # "ending" claim (the previous attempt died) can be taken over.
+    session = sessions_col.find_one_and_update(
+        {
+            "session_id": session_id,
+            "instructor_id": current_user["instructor_id"],
+            "$or": [{"status": "active"}, _stale_ending_filter()],
+        },
+        {"$set": {"status": "ending", "ending_since": now_utc()}},
+    )
     if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    if session.get("instructor_id") != current_user["instructor_id"]:
-        raise HTTPException(status_code=403, detail="Forbidden")
-    if session.get("status") != "active":
-        raise HTTPException(status_code=400, detail="Session is not active")
-
-    road_type = (session.get("road_type") or "secondary").strip().lower()
-    dataset_used = session.get("dataset_used")
-
-    if not dataset_used or "rel_path" not in dataset_used:
-        raise HTTPException(status_code=400, detail="No dataset stored for this session")
-
-    root = resolve_datasets_root()
-    csv_path = (root / dataset_used["rel_path"]).resolve()
-
-    if not csv_path.exists():
-        raise HTTPException(status_code=500, detail="Stored dataset file not found")
-
-    df = pd.read_csv(csv_path)
+        _raise_claim_error(
+            sessions_col, {"session_id": session_id}, current_user["instructor_id"],
+            not_found="Session not found", bad_state="Session is not active",
+        )
 
     try:
-        ml_out = predict_from_dataframe(df, road_type)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"ML inference failed: {str(e)}")
+        ml_out = _run_session_inference(session)
+    except Exception:
+        # Hand the session back so the instructor can retry.
+        sessions_col.update_one(
+            {"session_id": session_id},
+            {"$set": {"status": "active"}, "$unset": {"ending_since": ""}},
+        )
+        raise
 
     analysis_summary = {
         "behavior": ml_out.get("label", "Unknown"),
@@ -473,15 +559,16 @@ def end_session(session_id: str, body: SessionEndRequest, current_user=Depends(r
         "icon": "🤖",
     }]
 
+    now = now_utc()
     result_doc = {
         "session_id": session_id,
         "booking_id": session.get("booking_id"),
         "trainee_id": session.get("trainee_id"),
         "instructor_id": session.get("instructor_id"),
         "instructor_name": session.get("instructor_name", ""),
-        "created_at": now_utc(),
+        "created_at": now,
         "method": "ml_v1",
-        "dataset_used": dataset_used,
+        "dataset_used": session.get("dataset_used"),
         "analysis": analysis_summary,
         "ai_feedback": ai_feedback,
     }
@@ -490,7 +577,7 @@ def end_session(session_id: str, body: SessionEndRequest, current_user=Depends(r
 
     sessions_col.update_one(
         {"session_id": session_id},
-        {"$set": {"status": "completed", "ended_at": now_utc()}},
+        {"$set": {"status": "completed", "ended_at": now}, "$unset": {"ending_since": ""}},
     )
 
     if session.get("booking_id"):
@@ -504,13 +591,13 @@ def end_session(session_id: str, body: SessionEndRequest, current_user=Depends(r
         {"$inc": {"total_sessions": 1}},
     )
 
-    return {
+    return MongoJSONResponse({
         "status": "ok",
         "session_id": session_id,
-        "analysis": to_jsonable(analysis_summary),
-        "ai_feedback": to_jsonable(ai_feedback),
-        "result_id": str(ins.inserted_id),
-    }
+        "analysis": analysis_summary,
+        "ai_feedback": ai_feedback,
+        "result_id": ins.inserted_id,
+    })
 
 
 # ── Session notes ─────────────────────────────────────────────────────────────
@@ -532,12 +619,20 @@ def update_session_notes(session_id: str, body: SessionNoteUpdate, current_user=
 @router.get("/records/instructor")
 def instructor_records(current_user=Depends(require_role("instructor"))):
     instructor_id = current_user["instructor_id"]
-    docs = list(results_col.find({"instructor_id": instructor_id}).sort("created_at", -1).limit(200))
-    return to_jsonable(docs)
+    cur = (
+        results_col.find({"instructor_id": instructor_id}, _NO_WINDOWS, batch_size=_RECORDS_LIMIT)
+        .sort("created_at", -1)
+        .limit(_RECORDS_LIMIT)
+    )
+    return stream_json_array(cur)
 
 
 @router.get("/records/trainee")
 def trainee_records(current_user=Depends(require_role("trainee"))):
     trainee_id = current_user["user_id"]
-    docs = list(results_col.find({"trainee_id": trainee_id}).sort("created_at", -1).limit(200))
-    return to_jsonable(docs)
+    cur = (
+        results_col.find({"trainee_id": trainee_id}, _NO_WINDOWS, batch_size=_RECORDS_LIMIT)
+        .sort("created_at", -1)
+        .limit(_RECORDS_LIMIT)
+    )
+    return stream_json_array(cur)
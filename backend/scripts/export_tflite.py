@@ -0,0 +1,55 @@
+"""
+export_tflite.py — Convert the Keras classifiers to quantised TFLite models
+===========================================================================
+Run from the backend directory:
+    python -m scripts.export_tflite
+
+Writes app/artifacts/{motor,secondary}/<road>_model.tflite next to the .keras
+files. load_artifacts() prefers these when present (set ML_TFLITE=0 to force
+the Keras path). Pass .keras paths to convert other models instead, e.g. the
+ml-model classifiers for preprocessing_inference.predict_windows:
+    python -m scripts.export_tflite ../ml-model/models/motor_model.keras
+
+Uses dynamic-range quantisation: int8 weights, float
+activations — no representative dataset needed and safe for the LSTM layers.
+"""
+
+import os
+import sys
+
+from app.ml.keras_runtime import ARTIFACTS_DIR, _lazy_import_keras
+
+
+def convert(model_path: str) -> str:
+    """Quantise one .keras model to a .tflite file beside it; returns its path."""
+    import tensorflow as tf
+
+    keras = _lazy_import_keras()
+    model = keras.models.load_model(model_path, compile=False)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    # Recurrent layers may need TF ops that have no TFLite builtin.
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+        tf.lite.OpsSet.SELECT_TF_OPS,
+    ]
+    converter._experimental_lower_tensor_list_ops = False
+
+    out_path = os.path.splitext(model_path)[0] + ".tflite"
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    return out_path
+
+
+def export(road: str) -> str:
+    return convert(os.path.join(ARTIFACTS_DIR, road, f"{road}_model.keras"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            print(f"✅ {path}: {convert(path)}")
+    else:
+        for road in ("motor", "secondary"):
+            print(f"✅ {road}: {export(road)}")
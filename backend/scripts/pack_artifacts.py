@@ -0,0 +1,30 @@
+"""
+pack_artifacts.py — Pack both scalers' inference statistics into one file
+==========================================================================
+Run from the backend directory (re-run whenever a scaler is retrained):
+    python -m scripts.pack_artifacts
+
+Writes app/artifacts/inference_params.npz holding float32 mean / inverse
+scale per road type. load_artifacts() reads it instead of unpickling the two
+sklearn scalers; delete the file to fall back to the .pkl scalers.
+"""
+
+import os
+
+import joblib
+import numpy as np
+
+from app.ml.keras_runtime import ARTIFACTS_DIR, PARAMS_PATH, _scaler_params
+
+
+def pack() -> str:
+    arrays = {}
+    for road in ("motor", "secondary"):
+        scaler = joblib.load(os.path.join(ARTIFACTS_DIR, road, f"{road}_scaler.pkl"))
+        arrays[f"{road}_mean"], arrays[f"{road}_inv_scale"] = _scaler_params(scaler)
+    np.savez(PARAMS_PATH, **arrays)
+    return PARAMS_PATH
+
+
+if __name__ == "__main__":
+    print(f"✅ {pack()}")
@@ -21,38 +21,62 @@ import os
 import sys
 import uuid
 import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import chain
 from pathlib import Path
-from pymongo import MongoClient
+import numpy as np
+from pymongo import MongoClient, UpdateOne
 import bcrypt
 from dotenv import load_dotenv
 
 # Load .env from the backend directory (one level up from scripts/)
-load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(BACKEND_DIR / ".env")
+
+# Make `app` importable when run as a plain script from scripts/.
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
 
 # ── Config ──────────────────────────────────────────────────────────────────
 
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB  = os.getenv("MONGO_DB", "driver_behavior")
 
-if not MONGO_URI:
-    print("❌ MONGO_URI not found. Make sure .env exists in the backend folder.")
-    sys.exit(1)
-
-print(f"   Connecting to: {MONGO_URI[:40]}...")
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB]
-
-# ── Collections ─────────────────────────────────────────────────────────────
-
-users_col              = db["users"]
-instructor_profiles_col = db["instructor_profiles"]
-availability_col       = db["availability"]
-bookings_col           = db["bookings"]
-sessions_col           = db["sessions"]
-results_col            = db["results"]
-reviews_col            = db["reviews"]
-settings_col           = db["settings"]
+# ── Connection / collections ────────────────────────────────────────────────
+# Bound by connect() from the CLI entry point, never at import: the password
+# hashing pool's spawned workers re-import this module and must not open (or
+# inherit) a MongoClient.
+
+client = db = None
+users_col = instructor_profiles_col = availability_col = bookings_col = None
+sessions_col = results_col = reviews_col = settings_col = None
+
+def connect():
+    global client, db, users_col, instructor_profiles_col, availability_col
+    global bookings_col, sessions_col, results_col, reviews_col, settings_col
+
+    if not MONGO_URI:
+        print("❌ MONGO_URI not found. Make sure .env exists in the backend folder.")
+        sys.exit(1)
+
+    print(f"   Connecting to: {MONGO_URI[:40]}...")
+    # Throwaway demo data: acknowledge on the primary only, skip the journal wait.
+    # The pool only needs to cover insert_batches' handful of concurrent writers.
+    client = MongoClient(MONGO_URI, maxPoolSize=16, minPoolSize=4, w=1, journal=False)
+    # Open the first connection now rather than on the first insert.
+    client.admin.command("ping")
+    db = client[MONGO_DB]
+
+    users_col              = db["users"]
+    instructor_profiles_col = db["instructor_profiles"]
+    availability_col       = db["availability"]
+    bookings_col           = db["bookings"]
+    sessions_col           = db["sessions"]
+    results_col            = db["results"]
+    reviews_col            = db["reviews"]
+    settings_col           = db["settings"]
 
 # ── Helpers ─────────────────────────────────────────────────────────────────
 
@@ -60,121 +84,274 @@ def now():      return datetime.utcnow()
 def days_ago(n): return now() - timedelta(days=n)
 def days_from_now(n): return now() + timedelta(days=n)
 def uid():      return uuid.uuid4().hex
-def hash_pw(p): return bcrypt.hashpw(p.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+# Demo passwords don't need production work factors; 4 is bcrypt's minimum.
+SEED_BCRYPT_ROUNDS = int(os.getenv("SEED_BCRYPT_ROUNDS", "4"))
+def hash_pw(p): return bcrypt.hashpw(p.encode("utf-8"), bcrypt.gensalt(rounds=SEED_BCRYPT_ROUNDS)).decode("utf-8")
+
+# Demo CSV names a seeded session can claim, per road type.
+DATASET_CSVS = {rt: tuple(f"D{i}_{rt}_data.csv" for i in range(1, 7)) for rt in ("secondary", "motor")}
+
+WINDOW_FEATURES = np.array(["speed_variance", "lane_offset", "brake_intensity", "steering_angle", "acceleration"])
+
+def insert_batches(*batches):
+    """
+    insert_many each (collection, docs) pair concurrently. The collections are
+    independent and pymongo releases the GIL on socket I/O, so the round
+    trips overlap. Returns the InsertManyResults in argument order (None for
+    an empty list).
+    """
+    def _insert(b):
+        return b[0].insert_many(b[1], ordered=False) if b[1] else None
+
+    with ThreadPoolExecutor(max_workers=len(batches)) as ex:
+        return list(ex.map(_insert, batches))
+
+DEMO_PASSWORD = "demo1234"
+
+def demo_password_hashes(n):
+    """
+    n bcrypt hashes of the demo password. By default one hash is shared by
+    every account; SEED_UNIQUE_HASHES=1 salts each separately, spread over a
+    process pool since bcrypt holds the GIL. The pool always spawns, so no
+    worker is forked with the parent's live MongoClient.
+    """
+    if os.getenv("SEED_UNIQUE_HASHES") != "1":
+        return [hash_pw(DEMO_PASSWORD)] * n
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as ex:
+        return list(ex.map(hash_pw, [DEMO_PASSWORD] * n))
+
+def gen_slots(instructor_ids, t0):
+    """
+    Yield availability slots for every instructor, 14 days back to 20 ahead
+    of t0. insert_many consumes it lazily, so the docs are never all held in
+    memory at once.
+    """
+    for ids in instructor_ids.values():
+        iid = ids["instructor_id"]
+
+        # Past slots (already booked — status: booked)
+        # Future slots (open for booking)
+        for day_offset in range(-14, 21):
+            # Each instructor has 2-3 slots per day
+            if random.random() < 0.3:
+                continue  # skip some days (days off)
+
+            base_date = t0 + timedelta(days=day_offset)
+            hours = random.sample([8, 10, 12, 14, 16, 18], k=random.randint(2, 3))
+
+            for hour in sorted(hours):
+                slot_start = base_date.replace(hour=hour, minute=0, second=0, microsecond=0)
+                slot_end   = slot_start + timedelta(minutes=60)
+
+                is_past = day_offset < 0
+                # Past slots are either booked or were open (expired)
+                if is_past:
+                    status = random.choice(["booked", "booked", "expired"])
+                else:
+                    status = "open"
+
+                yield {
+                    "slot_id":        uid(),
+                    "instructor_id":  iid,
+                    "date":           slot_start.strftime("%Y-%m-%d"),
+                    "start_time":     slot_start.isoformat(),
+                    "end_time":       slot_end.isoformat(),
+                    "duration_min":   60,
+                    "status":         status,  # open | booked | expired | cancelled
+                    "booked_by":      None,
+                    "created_at":     t0 - timedelta(days=max(1, abs(day_offset) + 5)),
+                }
 
 # ── Reset ───────────────────────────────────────────────────────────────────
 
+# Collections this script owns. Their index specs come from
+# app.database.INDEX_SPECS, imported lazily (see connect()) so the spawned
+# hashing workers never build the API's client.
+SEED_COLLECTIONS = (
+    "users", "instructor_profiles", "availability", "bookings",
+    "sessions", "results", "reviews", "settings",
+)
+
 def reset_all():
     print("🗑️  Wiping all collections...")
-    for col in [users_col, instructor_profiles_col, availability_col,
-                bookings_col, sessions_col, results_col, reviews_col, settings_col]:
-        col.delete_many({})
+    # Indexes go too: the bulk load runs against bare collections and
+    # build_indexes() creates each one in a single pass afterwards.
+    for name in SEED_COLLECTIONS:
+        db[name].delete_many({})
+        db[name].drop_indexes()
+    print("   Done.\n")
+
+def build_indexes():
+    print("📇 Building indexes...")
+    from app.database import INDEX_SPECS
+
+    for name in SEED_COLLECTIONS:
+        db[name].create_indexes(INDEX_SPECS[name])
     print("   Done.\n")
 
+# ── Demo content ────────────────────────────────────────────────────────────
+
+INSTRUCTORS = (
+    {
+        "name":        "Dr. Sarah Mitchell",
+        "email":       "sarah.mitchell@driveiq.demo",
+        "bio":         "15 years of driving instruction experience. Specializes in nervous beginners and motorway confidence building. Patient, calm, and thorough approach.",
+        "specialties": ["Beginner Friendly", "Motorway", "Nervous Drivers"],
+        "experience_years": 15,
+        "price_per_session": 45.00,
+        "currency": "AED",
+        "vehicle": "Toyota Yaris 2024 (Dual Control)",
+        "languages": ["English", "Arabic"],
+        "location_area": "Dubai Marina",
+    },
+    {
+        "name":        "Prof. James Carter",
+        "email":       "james.carter@driveiq.demo",
+        "bio":         "Former racing instructor turned driving educator. Expert in defensive driving and high-speed confidence. Great for students who want to feel in control at any speed.",
+        "specialties": ["Defensive Driving", "Highway", "Advanced Techniques"],
+        "experience_years": 12,
+        "price_per_session": 55.00,
+        "currency": "AED",
+        "vehicle": "Honda Civic 2023 (Dual Control)",
+        "languages": ["English"],
+        "location_area": "JBR / JLT",
+    },
+    {
+        "name":        "Ms. Fatima Al-Rashid",
+        "email":       "fatima.rashid@driveiq.demo",
+        "bio":         "Certified female instructor with a focus on empowering women drivers. Covers everything from parking to desert highway driving. Bilingual Arabic/English.",
+        "specialties": ["Women Drivers", "Parking", "City Driving"],
+        "experience_years": 8,
+        "price_per_session": 40.00,
+        "currency": "AED",
+        "vehicle": "Nissan Sunny 2024 (Dual Control)",
+        "languages": ["Arabic", "English"],
+        "location_area": "Al Barsha",
+    },
+    {
+        "name":        "Mr. David Thompson",
+        "email":       "david.thompson@driveiq.demo",
+        "bio":         "Specializes in test preparation and road test routes. 95% first-time pass rate. Structured lesson plans with clear progress tracking.",
+        "specialties": ["Test Preparation", "Road Test Routes", "Structured Lessons"],
+        "experience_years": 10,
+        "price_per_session": 50.00,
+        "currency": "AED",
+        "vehicle": "Kia Cerato 2024 (Dual Control)",
+        "languages": ["English", "Hindi"],
+        "location_area": "Deira / Bur Dubai",
+    },
+    {
+        "name":        "Dr. Priya Sharma",
+        "email":       "priya.sharma@driveiq.demo",
+        "bio":         "PhD in Transportation Safety. Research-backed teaching methods focused on hazard perception and situational awareness. Ideal for analytical learners.",
+        "specialties": ["Hazard Perception", "Night Driving", "Research-Based"],
+        "experience_years": 7,
+        "price_per_session": 48.00,
+        "currency": "AED",
+        "vehicle": "Hyundai Accent 2024 (Dual Control)",
+        "languages": ["English", "Hindi", "Urdu"],
+        "location_area": "Business Bay",
+    },
+    {
+        "name":        "Mr. Omar Hassan",
+        "email":       "omar.hassan@driveiq.demo",
+        "bio":         "Young, energetic instructor who connects well with teens and university students. Makes learning fun while maintaining high safety standards.",
+        "specialties": ["Young Drivers", "University Students", "Beginner Friendly"],
+        "experience_years": 5,
+        "price_per_session": 35.00,
+        "currency": "AED",
+        "vehicle": "Toyota Corolla 2023 (Dual Control)",
+        "languages": ["Arabic", "English", "French"],
+        "location_area": "Academic City / Silicon Oasis",
+    },
+)
+
+AI_FEEDBACK_TEMPLATES = {
+    "Aggressive": (
+        {"priority": "high",   "title": "Harsh Braking Detected",     "message": "Multiple hard braking events detected. Try to anticipate traffic flow and brake gradually.", "icon": "🛑", "area": "Braking",     "score": 40},
+        {"priority": "high",   "title": "Aggressive Acceleration",    "message": "Rapid acceleration patterns observed. Smoother throttle control will improve safety.",      "icon": "⚡", "area": "Acceleration", "score": 45},
+        {"priority": "medium", "title": "Lane Discipline",            "message": "Minor lane deviations noticed. Keep a steady grip and focus on lane centering.",             "icon": "🛣️", "area": "Lane Control", "score": 55},
+    ),
+    "Drowsy": (
+        {"priority": "high",   "title": "Drowsiness Indicators",      "message": "Patterns consistent with drowsy driving detected. Take regular breaks every 2 hours.",      "icon": "😴", "area": "Alertness",    "score": 35},
+        {"priority": "high",   "title": "Lane Drift Detected",        "message": "Gradual lane drifting observed, often associated with fatigue. Pull over if tired.",        "icon": "↔️", "area": "Lane Control", "score": 40},
+        {"priority": "medium", "title": "Reaction Time",              "message": "Slower response patterns detected. Ensure adequate rest before driving.",                   "icon": "⏱️", "area": "Reaction",     "score": 45},
+    ),
+    "Normal": (
+        {"priority": "low",    "title": "Smooth Driving",             "message": "Good overall driving pattern. Continue maintaining consistent speed and safe following distance.", "icon": "✅", "area": "Overall",      "score": 85},
+        {"priority": "low",    "title": "Good Lane Discipline",       "message": "Excellent lane centering throughout the session. Keep it up!",                                   "icon": "🛣️", "area": "Lane Control", "score": 88},
+        {"priority": "medium", "title": "Speed Management",           "message": "Mostly within limits. Watch for slight overspeeding in transition zones.",                       "icon": "🏎️", "area": "Speed",        "score": 78},
+    ),
+}
+
+INSTRUCTOR_NOTE_TEMPLATES = (
+    "Good improvement since last session. Focus on maintaining lane position during turns.",
+    "Nice work on motorway merging. Practice mirror checks more consistently.",
+    "Braking has improved significantly. Work on smoother acceleration from stops.",
+    "Great session overall. Remember to check blind spots when changing lanes.",
+    "Solid progress! Try to reduce speed slightly when approaching roundabouts.",
+    "Very smooth driving today. Keep up the consistent performance.",
+    "Excellent control at higher speeds. Work on parking maneuvers next session.",
+    "Outstanding improvement! You're ready for more complex routes.",
+)
+
+# Fake review ratings are drawn uniformly from this bag, i.e. skewed positive
+_RATING_BAG = (3, 4, 4, 5, 5, 5)
+
+# Names on the reviews from "other students"
+FAKE_REVIEWERS = ("Lorna M.", "Seif A.", "Zaid K.", "Aisha R.", "Mohammed S.", "Sara T.", "Raj P.", "Noor H.")
+
 # ── Seed ────────────────────────────────────────────────────────────────────
 
 def seed():
     print("🌱 Seeding demo data (v2 — per-session booking model)...\n")
 
+    # The bulk of the writes land here; load them without secondary index
+    # maintenance when that is safe. Only empty collections (just reset, or a
+    # fresh database) lose their indexes: on a live one the unique indexes
+    # must keep guarding concurrent writers. build_indexes() restores them.
+    for col in (bookings_col, sessions_col, results_col):
+        if col.find_one({}, {"_id": 1}) is None:
+            col.drop_indexes()
+
+    rng = np.random.default_rng()
+
     # ════════════════════════════════════════════════════════════════════
     # 1. INSTRUCTORS
     # ════════════════════════════════════════════════════════════════════
 
-    instructors_data = [
-        {
-            "name":        "Dr. Sarah Mitchell",
-            "email":       "sarah.mitchell@driveiq.demo",
-            "bio":         "15 years of driving instruction experience. Specializes in nervous beginners and motorway confidence building. Patient, calm, and thorough approach.",
-            "specialties": ["Beginner Friendly", "Motorway", "Nervous Drivers"],
-            "experience_years": 15,
-            "price_per_session": 45.00,
-            "currency": "AED",
-            "vehicle": "Toyota Yaris 2024 (Dual Control)",
-            "languages": ["English", "Arabic"],
-            "location_area": "Dubai Marina",
-        },
-        {
-            "name":        "Prof. James Carter",
-            "email":       "james.carter@driveiq.demo",
-            "bio":         "Former racing instructor turned driving educator. Expert in defensive driving and high-speed confidence. Great for students who want to feel in control at any speed.",
-            "specialties": ["Defensive Driving", "Highway", "Advanced Techniques"],
-            "experience_years": 12,
-            "price_per_session": 55.00,
-            "currency": "AED",
-            "vehicle": "Honda Civic 2023 (Dual Control)",
-            "languages": ["English"],
-            "location_area": "JBR / JLT",
-        },
-        {
-            "name":        "Ms. Fatima Al-Rashid",
-            "email":       "fatima.rashid@driveiq.demo",
-            "bio":         "Certified female instructor with a focus on empowering women drivers. Covers everything from parking to desert highway driving. Bilingual Arabic/English.",
-            "specialties": ["Women Drivers", "Parking", "City Driving"],
-            "experience_years": 8,
-            "price_per_session": 40.00,
-            "currency": "AED",
-            "vehicle": "Nissan Sunny 2024 (Dual Control)",
-            "languages": ["Arabic", "English"],
-            "location_area": "Al Barsha",
-        },
-        {
-            "name":        "Mr. David Thompson",
-            "email":       "david.thompson@driveiq.demo",
-            "bio":         "Specializes in test preparation and road test routes. 95% first-time pass rate. Structured lesson plans with clear progress tracking.",
-            "specialties": ["Test Preparation", "Road Test Routes", "Structured Lessons"],
-            "experience_years": 10,
-            "price_per_session": 50.00,
-            "currency": "AED",
-            "vehicle": "Kia Cerato 2024 (Dual Control)",
-            "languages": ["English", "Hindi"],
-            "location_area": "Deira / Bur Dubai",
-        },
-        {
-            "name":        "Dr. Priya Sharma",
-            "email":       "priya.sharma@driveiq.demo",
-            "bio":         "PhD in Transportation Safety. Research-backed teaching methods focused on hazard perception and situational awareness. Ideal for analytical learners.",
-            "specialties": ["Hazard Perception", "Night Driving", "Research-Based"],
-            "experience_years": 7,
-            "price_per_session": 48.00,
-            "currency": "AED",
-            "vehicle": "Hyundai Accent 2024 (Dual Control)",
-            "languages": ["English", "Hindi", "Urdu"],
-            "location_area": "Business Bay",
-        },
-        {
-            "name":        "Mr. Omar Hassan",
-            "email":       "omar.hassan@driveiq.demo",
-            "bio":         "Young, energetic instructor who connects well with teens and university students. Makes learning fun while maintaining high safety standards.",
-            "specialties": ["Young Drivers", "University Students", "Beginner Friendly"],
-            "experience_years": 5,
-            "price_per_session": 35.00,
-            "currency": "AED",
-            "vehicle": "Toyota Corolla 2023 (Dual Control)",
-            "languages": ["Arabic", "English", "French"],
-            "location_area": "Academic City / Silicon Oasis",
-        },
-    ]
+    # 6 instructors + 2 trainees, all on the demo password
+    pw_hashes = iter(demo_password_hashes(len(INSTRUCTORS) + 2))
 
     instructor_ids = {}  # email -> {user_id, instructor_id}
 
     print("   👨‍🏫 Creating instructors...")
-    for inst in instructors_data:
+    # Account and profile ages, 30-90 days back, drawn in one go
+    t0 = datetime.utcnow()
+    user_created, profile_created = (
+        [t0 - timedelta(days=d) for d in row]
+        for row in rng.integers(30, 91, size=(2, len(INSTRUCTORS))).tolist()
+    )
+
+    user_docs = []
+    profile_docs = []
+    for i, inst in enumerate(INSTRUCTORS):
         user_id = uid()
         instructor_id = uid()
 
         # User doc (auth)
-        users_col.insert_one({
+        user_docs.append({
             "user_id":       user_id,
             "role":          "instructor",
             "name":          inst["name"],
             "email":         inst["email"],
-            "password_hash": hash_pw("demo1234"),
+            "password_hash": next(pw_hashes),
             "instructor_id": instructor_id,
-            "created_at":    days_ago(random.randint(30, 90)),
+            "created_at":    user_created[i],
         })
 
         # Instructor profile (public-facing)
-        instructor_profiles_col.insert_one({
+        profile_docs.append({
             "instructor_id":      instructor_id,
             "user_id":            user_id,
             "name":               inst["name"],
@@ -191,7 +368,7 @@ def seed():
             "total_sessions":     0,
             "verified":           True,
             "active":             True,
-            "created_at":         days_ago(random.randint(30, 90)),
+            "created_at":         profile_created[i],
         })
 
         instructor_ids[inst["email"]] = {
@@ -201,6 +378,8 @@ def seed():
         }
         print(f"      ✅ {inst['name']:25s} | {inst['price_per_session']} {inst['currency']}/session | {inst['location_area']}")
 
+    insert_batches((users_col, user_docs), (instructor_profiles_col, profile_docs))
+
     # ════════════════════════════════════════════════════════════════════
     # 2. TRAINEES
     # ════════════════════════════════════════════════════════════════════
@@ -215,7 +394,7 @@ def seed():
         "role":          "trainee",
         "name":          "Ziyan Hashim",
         "email":         "ziyan@driveiq.demo",
-        "password_hash": hash_pw("demo1234"),
+        "password_hash": next(pw_hashes),
         "created_at":    days_ago(25),
     })
 
@@ -224,7 +403,7 @@ def seed():
         "role":          "trainee",
         "name":          "Ahmad Khan",
         "email":         "ahmad@driveiq.demo",
-        "password_hash": hash_pw("demo1234"),
+        "password_hash": next(pw_hashes),
         "created_at":    days_ago(20),
     })
 
@@ -237,45 +416,9 @@ def seed():
 
     print("\n   📅 Creating availability slots...")
 
-    slot_count = 0
-    for email, ids in instructor_ids.items():
-        iid = ids["instructor_id"]
-
-        # Past slots (already booked — status: booked)
-        # Future slots (open for booking)
-        for day_offset in range(-14, 21):
-            # Each instructor has 2-3 slots per day
-            if random.random() < 0.3:
-                continue  # skip some days (days off)
-
-            base_date = now() + timedelta(days=day_offset)
-            hours = random.sample([8, 10, 12, 14, 16, 18], k=random.randint(2, 3))
-
-            for hour in sorted(hours):
-                slot_start = base_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                slot_end   = slot_start + timedelta(minutes=60)
-
-                is_past = day_offset < 0
-                # Past slots are either booked or were open (expired)
-                if is_past:
-                    status = random.choice(["booked", "booked", "expired"])
-                else:
-                    status = "open"
-
-                availability_col.insert_one({
-                    "slot_id":        uid(),
-                    "instructor_id":  iid,
-                    "date":           slot_start.strftime("%Y-%m-%d"),
-                    "start_time":     slot_start.isoformat(),
-                    "end_time":       slot_end.isoformat(),
-                    "duration_min":   60,
-                    "status":         status,  # open | booked | expired | cancelled
-                    "booked_by":      None,
-                    "created_at":     days_ago(max(1, abs(day_offset) + 5)),
-                })
-                slot_count += 1
-
-    print(f"      ✅ {slot_count} time slots created across {len(instructor_ids)} instructors")
+    # One clock read for the whole section; every slot is relative to it.
+    # Nothing is built yet: the generator is drained by section 5's flush.
+    slots = gen_slots(instructor_ids, datetime.utcnow())
 
     # ════════════════════════════════════════════════════════════════════
     # 4. COMPLETED SESSIONS + BOOKINGS + RESULTS (for trainee 1)
@@ -300,35 +443,7 @@ def seed():
         {"days": 1,  "road": "motor",     "behavior": "Normal",     "score": 91, "badge": "Excellent",  "confidence": 0.95, "instructor": david},
     ]
 
-    ai_feedback_templates = {
-        "Aggressive": [
-            {"priority": "high",   "title": "Harsh Braking Detected",     "message": "Multiple hard braking events detected. Try to anticipate traffic flow and brake gradually.", "icon": "🛑", "area": "Braking",     "score": 40},
-            {"priority": "high",   "title": "Aggressive Acceleration",    "message": "Rapid acceleration patterns observed. Smoother throttle control will improve safety.",      "icon": "⚡", "area": "Acceleration", "score": 45},
-            {"priority": "medium", "title": "Lane Discipline",            "message": "Minor lane deviations noticed. Keep a steady grip and focus on lane centering.",             "icon": "🛣️", "area": "Lane Control", "score": 55},
-        ],
-        "Drowsy": [
-            {"priority": "high",   "title": "Drowsiness Indicators",      "message": "Patterns consistent with drowsy driving detected. Take regular breaks every 2 hours.",      "icon": "😴", "area": "Alertness",    "score": 35},
-            {"priority": "high",   "title": "Lane Drift Detected",        "message": "Gradual lane drifting observed, often associated with fatigue. Pull over if tired.",        "icon": "↔️", "area": "Lane Control", "score": 40},
-            {"priority": "medium", "title": "Reaction Time",              "message": "Slower response patterns detected. Ensure adequate rest before driving.",                   "icon": "⏱️", "area": "Reaction",     "score": 45},
-        ],
-        "Normal": [
-            {"priority": "low",    "title": "Smooth Driving",             "message": "Good overall driving pattern. Continue maintaining consistent speed and safe following distance.", "icon": "✅", "area": "Overall",      "score": 85},
-            {"priority": "low",    "title": "Good Lane Discipline",       "message": "Excellent lane centering throughout the session. Keep it up!",                                   "icon": "🛣️", "area": "Lane Control", "score": 88},
-            {"priority": "medium", "title": "Speed Management",           "message": "Mostly within limits. Watch for slight overspeeding in transition zones.",                       "icon": "🏎️", "area": "Speed",        "score": 78},
-        ],
-    }
-
-    instructor_note_templates = [
-        "Good improvement since last session. Focus on maintaining lane position during turns.",
-        "Nice work on motorway merging. Practice mirror checks more consistently.",
-        "Braking has improved significantly. Work on smoother acceleration from stops.",
-        "Great session overall. Remember to check blind spots when changing lanes.",
-        "Solid progress! Try to reduce speed slightly when approaching roundabouts.",
-        "Very smooth driving today. Keep up the consistent performance.",
-        "Excellent control at higher speeds. Work on parking maneuvers next session.",
-        "Outstanding improvement! You're ready for more complex routes.",
-    ]
-
+    bookings_batch, sessions_batch, results_batch = [], [], []
     for i, sd in enumerate(session_data):
         session_id = uid()
         booking_id = uid()
@@ -338,7 +453,7 @@ def seed():
         ended   = started + timedelta(minutes=random.randint(45, 75))
 
         # Booking doc
-        bookings_col.insert_one({
+        bookings_batch.append({
             "booking_id":     booking_id,
             "trainee_id":     trainee1_id,
             "instructor_id":  inst["instructor_id"],
@@ -351,7 +466,7 @@ def seed():
         })
 
         # Session doc (per-session instructor link)
-        sessions_col.insert_one({
+        sessions_batch.append({
             "session_id":        session_id,
             "booking_id":        booking_id,
             "instructor_id":     inst["instructor_id"],
@@ -361,26 +476,35 @@ def seed():
             "duration_min":      int((ended - started).total_seconds() / 60),
             "status":            "completed",
             "road_type":         sd["road"],
-            "dataset_used":      {"csv": f"D{random.randint(1,6)}_{sd['road']}_data.csv"},
+            "dataset_used":      {"csv": random.choice(DATASET_CSVS[sd["road"]])},
             "created_at":        session_created,
             "started_at":        started,
             "ended_at":          ended,
-            "instructor_notes":  instructor_note_templates[i],
+            "instructor_notes":  INSTRUCTOR_NOTE_TEMPLATES[i],
         })
 
-        # Anomaly windows
+        # Anomaly windows — all draws for the session in one go
         num_windows = 30
-        windows = []
-        for w in range(num_windows):
-            is_anomaly = random.random() < (0.4 if sd["behavior"] != "Normal" else 0.08)
-            windows.append({
+        is_anomaly = rng.random(num_windows) < (0.4 if sd["behavior"] != "Normal" else 0.08)
+        scores = np.round(np.where(
+            is_anomaly,
+            rng.uniform(0.6, 0.95, num_windows),
+            rng.uniform(0.0, 0.2, num_windows),
+        ), 3)
+        top_features = WINDOW_FEATURES[rng.integers(0, len(WINDOW_FEATURES), num_windows)]
+        windows = [
+            {
                 "window_index": w,
                 "start_min": w * 4,
                 "end_min": (w + 1) * 4,
-                "is_anomaly": is_anomaly,
-                "anomaly_score": round(random.uniform(0.6, 0.95), 3) if is_anomaly else round(random.uniform(0.0, 0.2), 3),
-                "top_feature": random.choice(["speed_variance", "lane_offset", "brake_intensity", "steering_angle", "acceleration"]) if is_anomaly else None,
-            })
+                "is_anomaly": anomaly,
+                "anomaly_score": score,
+                "top_feature": feature if anomaly else None,
+            }
+            for w, (anomaly, score, feature) in enumerate(
+                zip(is_anomaly.tolist(), scores.tolist(), top_features.tolist())
+            )
+        ]
 
         # Probabilities
         if sd["behavior"] == "Normal":
@@ -390,10 +514,10 @@ def seed():
         else:
             probs = {"Normal": round(random.uniform(0.10, 0.20), 2), "Aggressive": round(random.uniform(0.05, 0.10), 2), "Drowsy": round(sd["confidence"], 2)}
 
-        feedback = ai_feedback_templates.get(sd["behavior"], ai_feedback_templates["Normal"])
+        feedback = AI_FEEDBACK_TEMPLATES.get(sd["behavior"], AI_FEEDBACK_TEMPLATES["Normal"])
 
         # Result doc
-        results_col.insert_one({
+        results_batch.append({
             "session_id":     session_id,
             "booking_id":     booking_id,
             "trainee_id":     trainee1_id,
@@ -411,7 +535,7 @@ def seed():
             "ai_feedback":    feedback,
             "windows":        windows,
             "instructor_comment": {
-                "text":   instructor_note_templates[i],
+                "text":   INSTRUCTOR_NOTE_TEMPLATES[i],
                 "rating": min(5, max(1, sd["score"] // 20)),
                 "date":   ended.isoformat(),
             },
@@ -420,7 +544,57 @@ def seed():
         print(f"      Session {i+1}: {sd['behavior']:10s} | Score {sd['score']:3d} | {sd['road']:9s} | {inst['name']:25s} | {sd['days']}d ago")
 
     # ════════════════════════════════════════════════════════════════════
-    # 5. REVIEWS (from trainee 1 for instructors they've used)
+    # 5. UPCOMING BOOKING (for trainee 1)
+    # ════════════════════════════════════════════════════════════════════
+
+    print("\n   📅 Creating upcoming booking...")
+
+    upcoming_date = days_from_now(3).replace(hour=14, minute=0, second=0, microsecond=0)
+    upcoming_session_id = uid()
+    upcoming_booking_id = uid()
+    upcoming_slot_id    = uid()
+
+    # The slot
+    upcoming_slot = {
+        "slot_id":        upcoming_slot_id,
+        "instructor_id":  sarah["instructor_id"],
+        "date":           upcoming_date.strftime("%Y-%m-%d"),
+        "start_time":     upcoming_date.isoformat(),
+        "end_time":       (upcoming_date + timedelta(hours=1)).isoformat(),
+        "duration_min":   60,
+        "status":         "booked",
+        "booked_by":      trainee1_id,
+        "created_at":     days_ago(5),
+    }
+
+    # The booking
+    bookings_batch.append({
+        "booking_id":     upcoming_booking_id,
+        "trainee_id":     trainee1_id,
+        "instructor_id":  sarah["instructor_id"],
+        "slot_id":        upcoming_slot_id,
+        "slot_date":      upcoming_date.strftime("%Y-%m-%d"),
+        "start_time":     upcoming_date.isoformat(),
+        "end_time":       (upcoming_date + timedelta(hours=1)).isoformat(),
+        "status":         "confirmed",
+        "session_id":     None,  # created when session starts
+        "created_at":     days_ago(2),
+    })
+
+    print(f"      ✅ Booked with Dr. Sarah Mitchell on {upcoming_date.strftime('%b %d, %Y at %I:%M %p')}")
+
+    # One round trip per collection instead of one per document (results
+    # with 30 windows each are still far below the 16 MB batch limit)
+    slots_res, _, _, _ = insert_batches(
+        (availability_col, chain(slots, [upcoming_slot])),
+        (bookings_col, bookings_batch),
+        (sessions_col, sessions_batch),
+        (results_col, results_batch),
+    )
+    print(f"      ✅ {len(slots_res.inserted_ids)} time slots created across {len(instructor_ids)} instructors")
+
+    # ════════════════════════════════════════════════════════════════════
+    # 6. REVIEWS (from trainee 1 for instructors they've used)
     # ════════════════════════════════════════════════════════════════════
 
     print("\n   ⭐ Creating reviews...")
@@ -435,24 +609,23 @@ def seed():
     ]
 
     # Also add some reviews from "other students" to make it realistic
-    fake_reviewers = ["Lorna M.", "Seif A.", "Zaid K.", "Aisha R.", "Mohammed S.", "Sara T.", "Raj P.", "Noor H."]
-
+    reviews_batch = []
     for inst_email, ids in instructor_ids.items():
         iid = ids["instructor_id"]
         # 3-6 reviews from random students per instructor
         num_fake = random.randint(3, 6)
         for _ in range(num_fake):
-            rating = random.choices([3, 4, 4, 5, 5, 5], k=1)[0]  # skewed positive
+            rating = random.choice(_RATING_BAG)
             review_texts = [
                 f"Really enjoyed the session. {'Highly recommend!' if rating >= 4 else 'Good but could improve pace.'}",
                 f"{'Excellent' if rating >= 4 else 'Decent'} instructor. {'Very patient and clear.' if rating >= 4 else 'A bit rushed at times.'}",
                 f"{'Great experience!' if rating >= 4 else 'Average session.'} {'Learned a lot.' if rating >= 4 else 'Expected more hands-on practice.'}",
                 f"{'Would definitely book again.' if rating >= 4 else 'Might try a different instructor next time.'}",
             ]
-            reviews_col.insert_one({
+            reviews_batch.append({
                 "review_id":      uid(),
                 "instructor_id":  iid,
-                "reviewer_name":  random.choice(fake_reviewers),
+                "reviewer_name":  random.choice(FAKE_REVIEWERS),
                 "trainee_id":     uid(),  # fake trainee IDs
                 "rating":         rating,
                 "text":           random.choice(review_texts),
@@ -461,7 +634,7 @@ def seed():
 
     # Real reviews from Ziyan
     for rv in reviews_data:
-        reviews_col.insert_one({
+        reviews_batch.append({
             "review_id":      uid(),
             "instructor_id":  rv["instructor"]["instructor_id"],
             "reviewer_name":  "Ziyan H.",
@@ -471,62 +644,40 @@ def seed():
             "created_at":     days_ago(random.randint(1, 20)),
         })
 
-    # Now compute and update instructor ratings
+    reviews_col.insert_many(reviews_batch, ordered=False)
+
+    # Now compute and update instructor ratings: one $group per collection
+    # and one bulk_write, instead of three queries per instructor.
+    ratings = {
+        r["_id"]: r for r in reviews_col.aggregate([
+            {"$group": {"_id": "$instructor_id", "avg": {"$avg": "$rating"}, "cnt": {"$sum": 1}}},
+        ])
+    }
+    completed = {
+        c["_id"]: c["cnt"] for c in sessions_col.aggregate([
+            {"$match": {"status": "completed"}},
+            {"$group": {"_id": "$instructor_id", "cnt": {"$sum": 1}}},
+        ])
+    }
+
+    rating_updates = []
     for inst_email, ids in instructor_ids.items():
         iid = ids["instructor_id"]
-        all_reviews = list(reviews_col.find({"instructor_id": iid}))
-        if all_reviews:
-            avg_rating = round(sum(r["rating"] for r in all_reviews) / len(all_reviews), 1)
-            total_sessions_done = sessions_col.count_documents({"instructor_id": iid, "status": "completed"})
-            instructor_profiles_col.update_one(
+        r = ratings.get(iid)
+        if r:
+            avg_rating = round(r["avg"], 1)
+            rating_updates.append(UpdateOne(
                 {"instructor_id": iid},
                 {"$set": {
                     "rating": avg_rating,
-                    "total_reviews": len(all_reviews),
-                    "total_sessions": total_sessions_done,
+                    "total_reviews": r["cnt"],
+                    "total_sessions": completed.get(iid, 0),
                 }},
-            )
-            print(f"      ⭐ {ids['name']:25s} | Rating: {avg_rating}/5 ({len(all_reviews)} reviews)")
-
-    # ════════════════════════════════════════════════════════════════════
-    # 6. UPCOMING BOOKING (for trainee 1)
-    # ════════════════════════════════════════════════════════════════════
+            ))
+            print(f"      ⭐ {ids['name']:25s} | Rating: {avg_rating}/5 ({r['cnt']} reviews)")
 
-    print("\n   📅 Creating upcoming booking...")
-
-    upcoming_date = days_from_now(3).replace(hour=14, minute=0, second=0, microsecond=0)
-    upcoming_session_id = uid()
-    upcoming_booking_id = uid()
-    upcoming_slot_id    = uid()
-
-    # The slot
-    availability_col.insert_one({
-        "slot_id":        upcoming_slot_id,
-        "instructor_id":  sarah["instructor_id"],
-        "date":           upcoming_date.strftime("%Y-%m-%d"),
-        "start_time":     upcoming_date.isoformat(),
-        "end_time":       (upcoming_date + timedelta(hours=1)).isoformat(),
-        "duration_min":   60,
-        "status":         "booked",
-        "booked_by":      trainee1_id,
-        "created_at":     days_ago(5),
-    })
-
-    # The booking
-    bookings_col.insert_one({
-        "booking_id":     upcoming_booking_id,
-        "trainee_id":     trainee1_id,
-        "instructor_id":  sarah["instructor_id"],
-        "slot_id":        upcoming_slot_id,
-        "slot_date":      upcoming_date.strftime("%Y-%m-%d"),
-        "start_time":     upcoming_date.isoformat(),
-        "end_time":       (upcoming_date + timedelta(hours=1)).isoformat(),
-        "status":         "confirmed",
-        "session_id":     None,  # created when session starts
-        "created_at":     days_ago(2),
-    })
-
-    print(f"      ✅ Booked with Dr. Sarah Mitchell on {upcoming_date.strftime('%b %d, %Y at %I:%M %p')}")
+    if rating_updates:
+        instructor_profiles_col.bulk_write(rating_updates, ordered=False)
 
     # ════════════════════════════════════════════════════════════════════
     # 7. SETTINGS & ACHIEVEMENTS
@@ -585,6 +736,13 @@ def seed():
 
     # ── A couple sessions for trainee 2 ─────────────────────────────
     print("\n   📝 Creating sessions for Ahmad...")
+    bookings_batch, sessions_batch, results_batch = [], [], []
+    # Fields identical across Ahmad's sessions, built once and spread into each doc
+    ahmad_note = "Keep practicing, good effort."
+    booking_base = {"trainee_id": trainee2_id, "status": "completed"}
+    session_base = {"trainee_id": trainee2_id, "vehicle_id": "VH-301", "duration_min": 55,
+                    "status": "completed", "instructor_notes": ahmad_note}
+    result_base = {"trainee_id": trainee2_id, "method": "ml_v1"}
     for i, sd in enumerate([
         {"days": 10, "road": "secondary", "behavior": "Aggressive", "score": 48, "badge": "Improving", "confidence": 0.75, "instructor": fatima},
         {"days": 5,  "road": "secondary", "behavior": "Normal",     "score": 65, "badge": "Improving", "confidence": 0.82, "instructor": fatima},
@@ -595,37 +753,45 @@ def seed():
         started = created.replace(hour=14, minute=0)
         ended = started + timedelta(minutes=55)
 
-        bookings_col.insert_one({
-            "booking_id": bid, "trainee_id": trainee2_id,
+        bookings_batch.append({
+            **booking_base,
+            "booking_id": bid,
             "instructor_id": sd["instructor"]["instructor_id"],
             "slot_date": created.strftime("%Y-%m-%d"),
             "start_time": started.isoformat(), "end_time": ended.isoformat(),
-            "status": "completed", "session_id": sid,
+            "session_id": sid,
             "created_at": created - timedelta(days=1),
         })
-        sessions_col.insert_one({
+        sessions_batch.append({
+            **session_base,
             "session_id": sid, "booking_id": bid,
             "instructor_id": sd["instructor"]["instructor_id"],
             "instructor_name": sd["instructor"]["name"],
-            "trainee_id": trainee2_id,
-            "vehicle_id": "VH-301", "duration_min": 55,
-            "status": "completed", "road_type": sd["road"],
+            "road_type": sd["road"],
             "created_at": created, "started_at": started, "ended_at": ended,
-            "instructor_notes": "Keep practicing, good effort.",
         })
-        results_col.insert_one({
+        results_batch.append({
+            **result_base,
             "session_id": sid, "booking_id": bid,
-            "trainee_id": trainee2_id,
             "instructor_id": sd["instructor"]["instructor_id"],
             "instructor_name": sd["instructor"]["name"],
-            "created_at": ended, "method": "ml_v1",
+            "created_at": ended,
             "analysis": {"behavior": sd["behavior"], "confidence": sd["confidence"],
                          "overall": sd["score"], "badge": sd["badge"], "probs": {}},
-            "ai_feedback": ai_feedback_templates.get(sd["behavior"], []),
-            "instructor_comment": {"text": "Keep practicing, good effort.", "rating": 3, "date": ended.isoformat()},
+            "ai_feedback": AI_FEEDBACK_TEMPLATES.get(sd["behavior"], ()),
+            "instructor_comment": {"text": ahmad_note, "rating": 3, "date": ended.isoformat()},
         })
         print(f"      Session {i+1}: {sd['behavior']:10s} | Score {sd['score']:3d} | {sd['instructor']['name']}")
 
+    insert_batches(
+        (bookings_col, bookings_batch),
+        (sessions_col, sessions_batch),
+        (results_col, results_batch),
+    )
+
+    print()
+    build_indexes()
+
     # ════════════════════════════════════════════════════════════════════
     # DONE
     # ════════════════════════════════════════════════════════════════════
@@ -644,20 +810,21 @@ def seed():
         print(f"  │   {email:52s} │")
     print(f"  └────────────────────────────────────────────────────────┘")
     print(f"\n  Collections:")
-    print(f"    users:                {users_col.count_documents({})}")
-    print(f"    instructor_profiles:  {instructor_profiles_col.count_documents({})}")
-    print(f"    availability:         {availability_col.count_documents({})}")
-    print(f"    bookings:             {bookings_col.count_documents({})}")
-    print(f"    sessions:             {sessions_col.count_documents({})}")
-    print(f"    results:              {results_col.count_documents({})}")
-    print(f"    reviews:              {reviews_col.count_documents({})}")
-    print(f"    settings:             {settings_col.count_documents({})}")
+    print(f"    users:                {users_col.estimated_document_count()}")
+    print(f"    instructor_profiles:  {instructor_profiles_col.estimated_document_count()}")
+    print(f"    availability:         {availability_col.estimated_document_count()}")
+    print(f"    bookings:             {bookings_col.estimated_document_count()}")
+    print(f"    sessions:             {sessions_col.estimated_document_count()}")
+    print(f"    results:              {results_col.estimated_document_count()}")
+    print(f"    reviews:              {reviews_col.estimated_document_count()}")
+    print(f"    settings:             {settings_col.estimated_document_count()}")
     print()
 
 
 # ── CLI ─────────────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
+    connect()
     if "--reset" in sys.argv:
         reset_all()
     seed()
@@ -12,16 +12,23 @@ This inserts:
 Window counts vary between 16-28 (64-112 min sessions, i.e. ~1-2 hours).
 """
 
+import os
+import sys
 import uuid
 import random
 from datetime import datetime, timedelta
 
+import numpy as np
+
 # ── Adjust this import to match your project structure ──────────────────────
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
+
 try:
-    from app.database import sessions_col, results_col
+    from app.database import sessions_col, results_col, ensure_indexes
 except ImportError:
     from pymongo import MongoClient
-    import os
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     MONGO_DB = os.getenv("MONGO_DB", "driveiq")
     client = MongoClient(MONGO_URI)
@@ -29,6 +36,11 @@ except ImportError:
     sessions_col = db["sessions"]
     results_col = db["results"]
 
+    def ensure_indexes():
+        # The specs live in app.database.INDEX_SPECS; without the app package
+        # the API's startup hook is what creates them.
+        pass
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONFIG
@@ -56,7 +68,7 @@ NORMAL_FEEDBACK = [
 ]
 
 
-def _generate_windows(num_windows, normal_pct, aggressive_pct, road_type, seed_val=42):
+def _generate_windows(num_windows, normal_pct, aggressive_pct, road_type, seed_val=42, rng=None):
     """
     Generate variable-length window arrays with road-type-aware metrics.
     
@@ -66,86 +78,104 @@ def _generate_windows(num_windows, normal_pct, aggressive_pct, road_type, seed_v
         aggressive_pct: fraction of aggressive windows (remainder = drowsy)
         road_type: "Motorway" or "Secondary" — affects speed ranges
         seed_val: for reproducibility
+        rng: Generator to draw from instead (takes precedence over seed_val)
     """
-    random.seed(seed_val)
+    if rng is None:
+        rng = np.random.default_rng(seed_val)
 
     aggressive_count = max(0, round(num_windows * aggressive_pct))
     drowsy_count = max(0, num_windows - round(num_windows * normal_pct) - aggressive_count)
     normal_count = num_windows - aggressive_count - drowsy_count
 
-    classifications = (
+    classifications = np.array(
         ["Normal"] * normal_count
         + ["Aggressive"] * aggressive_count
         + ["Drowsy"] * drowsy_count
     )
-    random.shuffle(classifications)
+    rng.shuffle(classifications)
 
     is_motorway = road_type.lower() in ("motorway", "motor", "highway")
+    is_aggressive = classifications == "Aggressive"
+    is_drowsy = classifications == "Drowsy"
+
+    # Draw every random value up front, one vector per metric; each window
+    # reads only the entries that apply to its label.
+    n = num_windows
+    knn_distance = np.round(np.select(
+        [is_aggressive, is_drowsy],
+        [rng.uniform(4.0, 7.0, n), rng.uniform(3.0, 5.5, n)],
+        rng.uniform(1.2, 3.5, n),
+    ), 4)
+    severity = np.round(np.where(is_aggressive, rng.uniform(3.5, 8.5, n), rng.uniform(1.5, 5.5, n)), 1)
+    overspeeding = rng.random(n) < 0.5
+    max_spd = np.round(rng.uniform(130, 165, n) if is_motorway else rng.uniform(72, 98, n), 2)
+    speed_ratio = np.round(rng.uniform(-60, -10, n), 2)
+    accel = np.round(rng.uniform(2.8, 6.0, n), 2)
+    brake = np.round(rng.uniform(0.55, 0.95, n), 3)
+    lane_dev = np.round(rng.uniform(0.2, 0.8, n), 3)
+    steer_var = np.round(rng.uniform(1.8, 6.0, n), 2)
+    normal_fb = rng.integers(0, len(NORMAL_FEEDBACK), n)
 
     windows = []
-    for i, label in enumerate(classifications):
+    for i, label in enumerate(classifications.tolist()):
         w = {
             "window_id": i,
             "predicted_label": label,
             "alert_cause": "No alert",
             "severity": 0.0,
-            "knn_distance": round(random.uniform(1.2, 3.5), 4),
+            "knn_distance": float(knn_distance[i]),
             "trigger_features": [],
             "feedback": None,
         }
 
         if label == "Aggressive":
-            cause = random.choice(["Overspeeding", "Harsh acceleration / braking"])
-            severity = round(random.uniform(3.5, 8.5), 1)
-            w["alert_cause"] = cause
-            w["severity"] = severity
-            w["knn_distance"] = round(random.uniform(4.0, 7.0), 4)
-
-            if cause == "Overspeeding":
-                max_spd = round(random.uniform(130, 165), 2) if is_motorway else round(random.uniform(72, 98), 2)
+            w["severity"] = float(severity[i])
+
+            if overspeeding[i]:
+                spd = float(max_spd[i])
+                w["alert_cause"] = "Overspeeding"
                 w["trigger_features"] = [
-                    {"feature": "Maximum Speed", "value": max_spd, "unit": "km/h"},
-                    {"feature": "Speed Ratio", "value": round(random.uniform(-60, -10), 2), "unit": "ratio"},
+                    {"feature": "Maximum Speed", "value": spd, "unit": "km/h"},
+                    {"feature": "Speed Ratio", "value": float(speed_ratio[i]), "unit": "ratio"},
                 ]
                 w["feedback"] = (
                     f"Your driving in this window shows signs of overspeeding. "
-                    f"The maximum speed reached {max_spd} km/h, which exceeds the expected range "
+                    f"The maximum speed reached {spd} km/h, which exceeds the expected range "
                     f"for this road type. Try maintaining a consistent speed within the posted limits, "
                     f"especially when transitioning between road segments."
                 )
             else:
-                accel = round(random.uniform(2.8, 6.0), 2)
+                acc = float(accel[i])
+                w["alert_cause"] = "Harsh acceleration / braking"
                 w["trigger_features"] = [
-                    {"feature": "Longitudinal Acceleration", "value": accel, "unit": "m/s²"},
-                    {"feature": "Brake Pressure", "value": round(random.uniform(0.55, 0.95), 3), "unit": "normalized"},
+                    {"feature": "Longitudinal Acceleration", "value": acc, "unit": "m/s²"},
+                    {"feature": "Brake Pressure", "value": float(brake[i]), "unit": "normalized"},
                 ]
                 w["feedback"] = (
                     f"Harsh braking was detected in this window with a longitudinal acceleration of "
-                    f"{accel} m/s². This suggests sudden stops that can be uncomfortable for passengers "
+                    f"{acc} m/s². This suggests sudden stops that can be uncomfortable for passengers "
                     f"and indicate late reaction to traffic changes. "
                     f"Try anticipating stops earlier and applying gradual pressure."
                 )
 
         elif label == "Drowsy":
-            severity = round(random.uniform(1.5, 5.5), 1)
+            dev = float(lane_dev[i])
+            steer = float(steer_var[i])
             w["alert_cause"] = "Unstable driving"
-            w["severity"] = severity
-            w["knn_distance"] = round(random.uniform(3.0, 5.5), 4)
-            lane_dev = round(random.uniform(0.2, 0.8), 3)
-            steer_var = round(random.uniform(1.8, 6.0), 2)
+            w["severity"] = float(severity[i])
             w["trigger_features"] = [
-                {"feature": "Lane Deviation", "value": lane_dev, "unit": "meters"},
-                {"feature": "Steering Variability", "value": steer_var, "unit": "degrees"},
+                {"feature": "Lane Deviation", "value": dev, "unit": "meters"},
+                {"feature": "Steering Variability", "value": steer, "unit": "degrees"},
             ]
             w["feedback"] = (
                 f"Your driving in this window shows patterns consistent with drowsiness. "
-                f"Lane deviation of {lane_dev} meters and steering variability of {steer_var} degrees "
+                f"Lane deviation of {dev} meters and steering variability of {steer} degrees "
                 f"suggest reduced alertness. Consider taking a break if you've been driving for an "
                 f"extended period. Fatigue significantly impacts reaction times."
             )
 
         else:
-            w["feedback"] = random.choice(NORMAL_FEEDBACK)
+            w["feedback"] = NORMAL_FEEDBACK[normal_fb[i]]
 
         windows.append(w)
 
@@ -156,7 +186,10 @@ def _generate_windows(num_windows, normal_pct, aggressive_pct, road_type, seed_v
 # BUILD DOCUMENTS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def build_session_and_result(trainee_id, road_type, windows, performance_score, days_ago=0):
+VEHICLE_IDS = ["VH-487", "VH-312", "VH-891"]
+
+
+def build_session_and_result(trainee_id, road_type, windows, performance_score, days_ago=0, rng=None):
     session_id = uuid.uuid4().hex
     booking_id = uuid.uuid4().hex
     created = datetime.utcnow() - timedelta(days=days_ago)
@@ -181,7 +214,7 @@ def build_session_and_result(trainee_id, road_type, windows, performance_score,
         "instructor_id": FAKE_INSTRUCTOR_ID,
         "instructor_name": FAKE_INSTRUCTOR_NAME,
         "trainee_id": trainee_id,
-        "vehicle_id": random.choice(["VH-487", "VH-312", "VH-891"]),
+        "vehicle_id": str(rng.choice(VEHICLE_IDS)) if rng is not None else random.choice(VEHICLE_IDS),
         "duration_min": duration,
         "status": "completed",
         "road_type": road_type,
@@ -252,6 +285,27 @@ def build_session_and_result(trainee_id, road_type, windows, performance_score,
 # SEED
 # ═══════════════════════════════════════════════════════════════════════════════
 
+SEED_BATCH = 500
+
+
+def _iter_seed_docs(configs):
+    """Yield (session_doc, result_doc) per config, built lazily."""
+    for (trainee, road, n_win, norm_pct, agg_pct, score, days, sd, notes) in configs:
+        # One seeded stream per config covers the windows and the session doc.
+        rng = np.random.default_rng(sd)
+        windows = _generate_windows(n_win, norm_pct, agg_pct, road_type=road, rng=rng)
+        s, r = build_session_and_result(
+            trainee_id=trainee,
+            road_type=road,
+            windows=windows,
+            performance_score=score,
+            days_ago=days,
+            rng=rng,
+        )
+        s["instructor_notes"] = notes
+        yield s, r
+
+
 def seed():
     print("🌱 Seeding DriveIQ report data...")
     print()
@@ -282,31 +336,36 @@ def seed():
          "Great improvement from last time. Lane discipline was much better."),
     ]
 
-    all_sessions = []
-    all_results = []
-
-    for (trainee, road, n_win, norm_pct, agg_pct, score, days, sd, notes) in configs:
-        windows = _generate_windows(n_win, norm_pct, agg_pct, road_type=road, seed_val=sd)
-        s, r = build_session_and_result(
-            trainee_id=trainee,
-            road_type=road,
-            windows=windows,
-            performance_score=score,
-            days_ago=days,
-        )
-        s["instructor_notes"] = notes
-        all_sessions.append(s)
-        all_results.append(r)
-
     # ── Clean up previous seed data ──────────────────────────────────────
+    # A fresh DB may never have run the API's startup hook; make sure the
+    # instructor_id deletes below use an index rather than a collection scan.
+    ensure_indexes()
     deleted_s = sessions_col.delete_many({"instructor_id": FAKE_INSTRUCTOR_ID})
     deleted_r = results_col.delete_many({"instructor_id": FAKE_INSTRUCTOR_ID})
     if deleted_s.deleted_count or deleted_r.deleted_count:
         print(f"  🧹 Cleaned up {deleted_s.deleted_count} old sessions, {deleted_r.deleted_count} old results")
 
     # ── Insert ───────────────────────────────────────────────────────────
-    sessions_col.insert_many(all_sessions)
-    results_col.insert_many(all_results)
+    # Results carry the full windows array, so flush every SEED_BATCH docs
+    # rather than holding the whole run in memory. Docs are independent;
+    # unordered lets the server apply them without stopping at the first failure.
+    all_sessions = []
+    batch_s, batch_r = [], []
+
+    def flush():
+        if batch_s:
+            sessions_col.insert_many(batch_s, ordered=False)
+            results_col.insert_many(batch_r, ordered=False)
+            batch_s.clear()
+            batch_r.clear()
+
+    for s, r in _iter_seed_docs(configs):
+        all_sessions.append(s)
+        batch_s.append(s)
+        batch_r.append(r)
+        if len(batch_s) >= SEED_BATCH:
+            flush()
+    flush()
 
     print(f"  ✅ Inserted {len(all_sessions)} sessions + results")
     print()
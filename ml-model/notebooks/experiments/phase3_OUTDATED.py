@@ -12,7 +12,8 @@ import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from sklearn.neighbors import NearestNeighbors
 from sklearn.cluster import KMeans
-import json
+import orjson
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # ============================================================================
@@ -51,6 +52,9 @@ CAUSE_GROUPS = {
     "Unstable steering": ['difcourse_mean', 'yaw_mean']
 }
 
+# Cluster alert types, in label_clusters' score-column order
+CLUSTER_ALERT_TYPES = ['Overspeed', 'Harsh maneuvers', 'Unstable steering', 'Tailgating']
+
 # Alert messages
 ALERT_MESSAGES = {
     "Overspeed": "Reduce speed and maintain safe limits",
@@ -67,6 +71,16 @@ def filter_available_features(feature_list, available_cols):
     """Return only features that exist in the dataframe"""
     return [f for f in feature_list if f in available_cols]
 
+def cause_column_indices(feature_cols, cause_groups):
+    """Map each cause to the column positions of its features in feature_cols; causes with none are dropped"""
+    col_pos = {c: i for i, c in enumerate(feature_cols)}
+    cause_idx = {}
+    for cause, features in cause_groups.items():
+        idxs = [col_pos[f] for f in features if f in col_pos]
+        if idxs:
+            cause_idx[cause] = np.array(idxs)
+    return cause_idx
+
 def filter_data_quality(df, hdop_threshold=5.0, vdop_threshold=5.0):
     """Optional: Filter out windows with poor GPS quality"""
     if 'hdop_mean' in df.columns and 'vdop_mean' in df.columns:
@@ -77,89 +91,83 @@ def filter_data_quality(df, hdop_threshold=5.0, vdop_threshold=5.0):
         print(f"GPS quality filter: {before} -> {after} windows ({before-after} removed)")
     return df
 
-def compute_knn_distance(row, scaler, knn, feature_cols):
-    """Compute KNN distance for a single row"""
-    row_df = row[feature_cols].to_frame().T
-    row_scaled = scaler.transform(row_df)
-    distances, _ = knn.kneighbors(row_scaled)
-    return distances.mean()
-
 # ============================================================================
 # FUZZY LOGIC SYSTEM
 # ============================================================================
 
 def triangular_mf(x, a, b, c):
-    """Triangular membership function"""
-    if x < a or x > c: 
-        return 0.0
-    if x == b: 
-        return 1.0
-    if a <= x < b:
-        return 0.0 if b == a else (x - a) / (b - a)
-    return 0.0 if c == b else (c - x) / (c - b)
+    """Triangular membership function, elementwise over an array"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rising = (x - a) / (b - a) if b != a else np.zeros_like(x)
+        falling = (c - x) / (c - b) if c != b else np.zeros_like(x)
+    out = np.where(x < b, rising, falling)
+    out = np.where(x == b, 1.0, out)
+    return np.where((x < a) | (x > c), 0.0, out)
 
 def trapezoidal_mf(x, a, b, c, d):
-    """Trapezoidal membership function"""
-    if x < a or x > d: 
-        return 0.0
-    if b <= x <= c: 
-        return 1.0
-    if a <= x < b:
-        return 0.0 if b == a else (x - a) / (b - a)
-    return 0.0 if d == c else (d - x) / (d - c)
-
-def fuzzify_inputs(severity, percentage):
-    """Fuzzify severity and percentage into membership degrees"""
-    return {
-        "s_low":  trapezoidal_mf(severity, 0.0, 0.0, 0.2, 0.4),
-        "s_med":  triangular_mf(severity, 0.3, 0.6, 0.85),
-        "s_high": trapezoidal_mf(severity, 0.7, 0.85, 1.0, 1.0),
-        "p_small": trapezoidal_mf(percentage, 0.0, 0.0, 0.15, 0.30),
-        "p_med":   triangular_mf(percentage, 0.25, 0.45, 0.65),
-        "p_dom":   trapezoidal_mf(percentage, 0.45, 0.60, 1.0, 1.0)
-    }
+    """Trapezoidal membership function, elementwise over an array"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rising = (x - a) / (b - a) if b != a else np.zeros_like(x)
+        falling = (d - x) / (d - c) if d != c else np.zeros_like(x)
+    out = np.where(x < b, rising, falling)
+    out = np.where((b <= x) & (x <= c), 1.0, out)
+    return np.where((x < a) | (x > d), 0.0, out)
 
-def tsk_output(weights, outputs):
-    """Takagi-Sugano-Kang defuzzification"""
-    w = np.array(weights, dtype=float)
-    y = np.array(outputs, dtype=float)
-    return float((w*y).sum() / w.sum()) if w.sum() > 0 else 0.0
-
-def compute_intensity(severity, percentage):
-    """Compute fuzzy intensity for a cause"""
-    m = fuzzify_inputs(severity, percentage)
-    w1 = m["s_high"] * m["p_dom"]   # High severity + dominant cause -> 0.95
-    w2 = m["s_med"]  * m["p_dom"]   # Medium severity + dominant -> 0.80
-    w3 = m["s_high"] * m["p_med"]   # High severity + medium cause -> 0.60
-    w4 = m["p_small"]               # Small contribution -> 0.10
-    return tsk_output([w1, w2, w3, w4], [0.95, 0.80, 0.60, 0.10])
+TSK_OUTPUTS = np.array([0.95, 0.80, 0.60, 0.10])
+
+def compute_intensity_matrix(severity, percentages):
+    """
+    Fuzzy (TSK) intensity for every (window, cause) pair at once.
+    severity: (N,), percentages: (N, C) -> intensities: (N, C)
+    """
+    S = np.asarray(severity, dtype=float)[:, None]
+    P = np.asarray(percentages, dtype=float)
+    s_med = triangular_mf(S, 0.3, 0.6, 0.85)
+    s_high = trapezoidal_mf(S, 0.7, 0.85, 1.0, 1.0)
+    p_small = trapezoidal_mf(P, 0.0, 0.0, 0.15, 0.30)
+    p_med = triangular_mf(P, 0.25, 0.45, 0.65)
+    p_dom = trapezoidal_mf(P, 0.45, 0.60, 1.0, 1.0)
+
+    # Four rules, stacked on a trailing axis:
+    #   high severity + dominant cause -> 0.95
+    #   medium severity + dominant     -> 0.80
+    #   high severity + medium cause   -> 0.60
+    #   small contribution             -> 0.10
+    W = np.stack([s_high * p_dom, s_med * p_dom, s_high * p_med, p_small], axis=-1)
+    w_sum = W.sum(axis=-1)
+    weighted = (W * TSK_OUTPUTS).sum(axis=-1)
+    return np.divide(weighted, w_sum, out=np.zeros_like(weighted), where=w_sum > 0)
 
 # ============================================================================
 # CORE ANALYSIS FUNCTIONS
 # ============================================================================
 
-def train_anomaly_detector(df, feature_cols, label_col='label', n_neighbors=5):
-    """Train KNN anomaly detector on NORMAL windows only"""
-    normal_df = df[df[label_col] == NORMAL_LABEL].copy()
-    print(f"Training on {len(normal_df)} NORMAL windows with {len(feature_cols)} features")
+def _standardize(X, mu, inv_sigma):
+    """(X - mu) * inv_sigma: StandardScaler.transform without its validation and copy"""
+    return (X - mu) * inv_sigma
+
+def train_anomaly_detector(X, labels, n_neighbors=5):
+    """Train KNN anomaly detector on NORMAL windows only (rows of X where labels == NORMAL_LABEL)"""
+    normal_mask = labels == NORMAL_LABEL
+    print(f"Training on {int(normal_mask.sum())} NORMAL windows with {X.shape[1]} features")
     
     scaler = StandardScaler()
-    normal_scaled = scaler.fit_transform(normal_df[feature_cols])
+    normal_scaled = scaler.fit_transform(X[normal_mask])
     
-    knn = NearestNeighbors(n_neighbors=n_neighbors, metric='euclidean')
-    knn.fit(normal_scaled)
+    # Tree index over a low-dimensional float32 copy: cheaper queries than
+    # brute force and half the memory per point
+    knn = NearestNeighbors(n_neighbors=n_neighbors, algorithm='kd_tree', leaf_size=40, metric='euclidean')
+    knn.fit(normal_scaled.astype(np.float32, copy=False))
     
-    return scaler, knn, normal_df
+    return scaler, knn, normal_mask
 
-def detect_anomalies(df, scaler, knn, feature_cols):
-    """Compute KNN distances and identify anomalies"""
+def detect_anomalies(df, X_scaled, knn):
+    """Compute KNN distances and identify anomalies (X_scaled: df's standardized feature matrix)"""
     df = df.copy()
     
-    # Compute KNN distance for all windows
-    df['knn_distance'] = df.apply(
-        lambda row: compute_knn_distance(row, scaler, knn, feature_cols),
-        axis=1
-    )
+    # Compute KNN distance for all windows in a single kneighbors call
+    distances, _ = knn.kneighbors(X_scaled)
+    df['knn_distance'] = distances.mean(axis=1)
     
     # Set threshold based on normal windows
     normal_dist = df[df['label'] == NORMAL_LABEL]['knn_distance']
@@ -173,210 +181,217 @@ def detect_anomalies(df, scaler, knn, feature_cols):
     
     return df, threshold
 
-def cluster_anomalies(df, scaler, feature_cols, n_clusters=3):
-    """Cluster anomalous windows to identify behavior types"""
-    anomalies = df[df['is_anomaly']].copy()
+def cluster_anomalies(df, X_scaled, n_clusters=3):
+    """Cluster anomalous windows to identify behavior types (X_scaled: df's standardized feature matrix)"""
+    anomaly_mask = df['is_anomaly'].to_numpy()
+    X_anom = X_scaled[anomaly_mask]
     
-    if len(anomalies) < n_clusters:
-        print(f"Warning: Only {len(anomalies)} anomalies, cannot cluster into {n_clusters} groups")
+    if len(X_anom) < n_clusters:
+        print(f"Warning: Only {len(X_anom)} anomalies, cannot cluster into {n_clusters} groups")
         return df
     
-    # Scale and cluster
-    X = scaler.transform(anomalies[feature_cols])
+    # Cluster
     kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    clusters = kmeans.fit_predict(X)
+    clusters = kmeans.fit_predict(X_anom)
     
-    # Assign clusters back to dataframe
-    df['cluster'] = np.nan
-    df.loc[anomalies.index, 'cluster'] = clusters
+    # Assign clusters back to dataframe by position; -1 marks normal windows
+    cluster_arr = np.full(len(df), -1, dtype=np.int32)
+    cluster_arr[anomaly_mask] = clusters
+    df['cluster'] = cluster_arr
     
     print(f"Clustered into {n_clusters} behavior types")
     return df, kmeans
 
+def _average_ranks(a):
+    """
+    Column-wise ranks of a 2-D array with ties averaged (pandas .rank()
+    semantics), by direct pairwise comparison: for a handful of clusters
+    this is cheaper than sorting.
+    """
+    less = (a[None, :, :] < a[:, None, :]).sum(axis=1)
+    equal = (a[None, :, :] == a[:, None, :]).sum(axis=1)
+    return less + (equal + 1) / 2
+
 def label_clusters(df, feature_cols):
     """Assign behavioral labels to clusters"""
-    cluster_summary = df[df['cluster'].notna()].groupby('cluster')[feature_cols].mean()
-    
-    # Compute scores for each cluster
-    cluster_summary['overspeed_score'] = (
-        cluster_summary['speed_kmh_mean'].rank() +
-        cluster_summary['speed_ratio_mean'].rank()
-    )
-    
-    harsh_cols = [c for c in ['acc_x_mean', 'acc_y_mean', 'acc_z_mean'] if c in cluster_summary.columns]
-    if harsh_cols:
-        cluster_summary['harsh_score'] = cluster_summary[harsh_cols].abs().sum(axis=1).rank()
-    else:
-        cluster_summary['harsh_score'] = 0
-    
-    if 'difcourse_mean' in cluster_summary.columns:
-        cluster_summary['unstable_score'] = cluster_summary['difcourse_mean'].rank()
-    else:
-        cluster_summary['unstable_score'] = 0
-    
-    tailgate_cols = [c for c in ['dist_front_mean', 'ttc_front_mean'] if c in cluster_summary.columns]
-    if tailgate_cols:
-        cluster_summary['tailgate_score'] = (
-            -cluster_summary['dist_front_mean'].rank() +  # Lower distance = worse
-            -cluster_summary['ttc_front_mean'].rank()      # Lower TTC = worse
+    cluster_summary = df[df['cluster'] >= 0].groupby('cluster')[feature_cols].mean()
+    means = cluster_summary.to_numpy()
+    col = {c: i for i, c in enumerate(cluster_summary.columns)}
+    
+    # Rank every feature across clusters at once, then score clusters as an
+    # (n_clusters, 4) matrix with columns in CLUSTER_ALERT_TYPES order. Ranks
+    # (not raw means) keep the four scores on a comparable scale.
+    ranks = _average_ranks(means)
+    scores = np.zeros((len(cluster_summary), len(CLUSTER_ALERT_TYPES)))
+    
+    scores[:, 0] = ranks[:, col['speed_kmh_mean']] + ranks[:, col['speed_ratio_mean']]
+    
+    harsh_idx = [col[c] for c in ['acc_x_mean', 'acc_y_mean', 'acc_z_mean'] if c in col]
+    if harsh_idx:
+        scores[:, 1] = _average_ranks(np.abs(means[:, harsh_idx]).sum(axis=1, keepdims=True))[:, 0]
+    
+    if 'difcourse_mean' in col:
+        scores[:, 2] = ranks[:, col['difcourse_mean']]
+    
+    if 'dist_front_mean' in col or 'ttc_front_mean' in col:
+        scores[:, 3] = (
+            -ranks[:, col['dist_front_mean']] +  # Lower distance = worse
+            -ranks[:, col['ttc_front_mean']]     # Lower TTC = worse
         )
-    else:
-        cluster_summary['tailgate_score'] = 0
-    
-    # Assign labels based on dominant score
-    cluster_labels = {}
-    for cluster_id, row in cluster_summary.iterrows():
-        scores = {
-            'Overspeed': row['overspeed_score'],
-            'Harsh maneuvers': row['harsh_score'],
-            'Unstable steering': row['unstable_score'],
-            'Tailgating': row['tailgate_score']
-        }
-        cluster_labels[cluster_id] = max(scores, key=scores.get)
+    
+    # Assign labels based on dominant score (first wins on ties)
+    labels = np.array(CLUSTER_ALERT_TYPES)[scores.argmax(axis=1)]
+    cluster_labels = dict(zip(cluster_summary.index.tolist(), labels.tolist()))
     
     df['alert_type'] = df['cluster'].map(cluster_labels)
     
     return df, cluster_labels
 
-def compute_feature_contributions(df, scaler, feature_cols):
-    """Compute how much each feature contributes to anomaly"""
-    # Z-scores (standardized deviations from normal)
-    Z = pd.DataFrame(
-        scaler.transform(df[feature_cols]),
-        columns=feature_cols,
-        index=df.index
-    )
-    
-    # Squared deviations
-    contrib = Z ** 2
-    
-    # Normalize to percentages per window
-    contrib_norm = contrib.div(contrib.sum(axis=1).replace(0, np.nan), axis=0).fillna(0)
-    
-    return contrib_norm
-
-def compute_cause_contributions(contrib_norm, cause_groups):
-    """Group feature contributions into cause categories"""
-    causes = []
-    
-    for idx, row in contrib_norm.iterrows():
-        cause_dict = {}
-        for cause, features in cause_groups.items():
-            available_features = [f for f in features if f in row.index]
-            if available_features:
-                cause_dict[cause] = float(row[available_features].sum())
-        
-        # Normalize to sum to 1
-        total = sum(cause_dict.values())
-        if total > 0:
-            cause_dict = {k: v/total for k, v in cause_dict.items()}
-        
-        causes.append(cause_dict)
+def normalize_rows(arr):
+    """Scale each row to sum to 1 in place; all-zero rows stay zero"""
+    totals = arr.sum(axis=1, keepdims=True)
+    np.divide(arr, totals, out=arr, where=totals > 0)
+    return arr
+
+def compute_feature_contributions(X_scaled):
+    """
+    Compute how much each feature contributes to anomaly.
+    X_scaled holds the z-scores (standardized deviations from normal);
+    returns an (N, F) array whose columns follow X_scaled's.
+    """
+    # Squared deviations, normalized to percentages per window
+    return normalize_rows(X_scaled * X_scaled)
+
+def compute_cause_contributions(contrib_norm_arr, cause_index_lists):
+    """
+    Group feature contributions into cause categories.
+    cause_index_lists[k] holds the contrib_norm_arr columns of cause k;
+    returns an (N, K) array of per-window shares that sum to 1.
+    """
+    cause_mat = np.empty((contrib_norm_arr.shape[0], len(cause_index_lists)))
+    for k, idxs in enumerate(cause_index_lists):
+        cause_mat[:, k] = contrib_norm_arr[:, idxs].sum(axis=1)
     
-    return pd.Series(causes, index=contrib_norm.index)
+    return normalize_rows(cause_mat)
 
 def normalize_severity(knn_distance, q95, q99):
-    """Normalize KNN distance to 0-1 severity scale"""
-    if knn_distance <= q95:
-        return 0.0
-    if knn_distance >= q99:
-        return 1.0
-    return float((knn_distance - q95) / (q99 - q95))
+    """Normalize KNN distances (array) to 0-1 severity scale"""
+    knn_distance = np.asarray(knn_distance, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ramp = (knn_distance - q95) / (q99 - q95)
+    return np.where(knn_distance <= q95, 0.0, np.where(knn_distance >= q99, 1.0, ramp))
 
 # ============================================================================
 # ALERT GENERATION
 # ============================================================================
 
-def generate_alert(row, threshold, q95, q99, cause_contributions, top_features):
-    """Generate structured alert for a single window"""
-    
-    # Basic info
-    knn_dist = float(row['knn_distance'])
+def _context_column(df, col):
+    """Column as a float array, all-NaN if the dataframe lacks it"""
+    if col in df.columns:
+        return df[col].to_numpy(dtype=float)
+    return np.full(len(df), np.nan)
+
+def generate_alerts(df, threshold, severity, cause_names, cause_mat, intensity_mat,
+                    contrib_arr, feature_cols):
+    """
+    Generate structured alerts for all windows.
+    Rankings and columns are extracted up front as arrays; the loop only
+    assembles each window's dict.
+    """
+    window_ids = df.index.to_numpy()
+    knn_dist = df['knn_distance'].to_numpy(dtype=float)
     is_anomaly = knn_dist > threshold
     
-    if not is_anomaly:
-        return {
-            'window_id': int(row.name),
-            'alert_level': 'normal',
-            'severity': 0.0,
-            'knn_distance': round(knn_dist, 3),
-            'message': 'Normal driving behavior',
-            'causes': [],
-            'recommendations': []
-        }
-    
-    # Compute severity
-    severity = normalize_severity(knn_dist, q95, q99)
-    
-    # Get cause contributions for this window
-    causes_dict = cause_contributions.loc[row.name]
-    
-    # Compute fuzzy intensity for each cause
-    cause_analysis = []
-    for cause, percentage in causes_dict.items():
-        intensity = compute_intensity(severity, percentage)
-        cause_analysis.append({
-            'cause': cause,
-            'contribution': round(percentage * 100, 1),
-            'intensity': round(intensity, 3)
-        })
+    # Top 2 causes by rounded intensity and top 6 features by contribution;
+    # stable sorts keep ties in column order
+    cause_rank = np.argsort(-np.round(intensity_mat, 3), axis=1, kind='stable')[:, :2]
+    feature_rank = np.argsort(-contrib_arr, axis=1, kind='stable')[:, :6]
     
-    # Sort by intensity
-    cause_analysis.sort(key=lambda x: x['intensity'], reverse=True)
-    top_causes = cause_analysis[:2]  # Top 2
-    
-    # Generate recommendations
-    recommendations = []
-    for c in top_causes:
-        if c['intensity'] > 0.5:  # Only recommend for significant causes
-            msg = ALERT_MESSAGES.get(c['cause'], f"Address {c['cause']}")
-            recommendations.append({
-                'cause': c['cause'],
-                'message': msg,
-                'priority': 'high' if c['intensity'] > 0.75 else 'medium'
+    max_speed = _context_column(df, 'max_speed_mean')
+    speed = _context_column(df, 'speed_kmh_mean')
+    num_lanes = _context_column(df, 'num_lanes_mean')
+    dist_front = _context_column(df, 'dist_front_mean')
+    
+    alerts = []
+    for i in range(len(df)):
+        window_id = int(window_ids[i])
+        knn = float(knn_dist[i])
+        
+        if not is_anomaly[i]:
+            alerts.append({
+                'window_id': window_id,
+                'alert_level': 'normal',
+                'severity': 0.0,
+                'knn_distance': round(knn, 3),
+                'message': 'Normal driving behavior',
+                'causes': [],
+                'recommendations': []
             })
+            continue
+        
+        sev = float(severity[i])
+        
+        top_causes = [
+            {
+                'cause': cause_names[k],
+                'contribution': round(float(cause_mat[i, k]) * 100, 1),
+                'intensity': round(float(intensity_mat[i, k]), 3)
+            }
+            for k in cause_rank[i]
+        ]
+        
+        # Generate recommendations
+        recommendations = []
+        for c in top_causes:
+            if c['intensity'] > 0.5:  # Only recommend for significant causes
+                msg = ALERT_MESSAGES.get(c['cause'], f"Address {c['cause']}")
+                recommendations.append({
+                    'cause': c['cause'],
+                    'message': msg,
+                    'priority': 'high' if c['intensity'] > 0.75 else 'medium'
+                })
+        
+        # Add context-specific details
+        context = {}
+        if not np.isnan(max_speed[i]):
+            context['speed_limit'] = round(float(max_speed[i]), 0)
+            context['actual_speed'] = round(float(speed[i]), 0)
+            if context['actual_speed'] > context['speed_limit']:
+                context['speed_excess'] = round(context['actual_speed'] - context['speed_limit'], 0)
+        
+        if not np.isnan(num_lanes[i]):
+            context['num_lanes'] = round(float(num_lanes[i]), 0)
+        
+        if not np.isnan(dist_front[i]):
+            context['following_distance'] = round(float(dist_front[i]), 1)
+        
+        # Determine alert level
+        if sev > 0.7:
+            alert_level = 'critical'
+        elif sev > 0.4:
+            alert_level = 'warning'
+        else:
+            alert_level = 'caution'
+        
+        top_features_list = [
+            {'feature': feature_cols[j], 'contribution': round(float(contrib_arr[i, j]) * 100, 1)}
+            for j in feature_rank[i]
+        ]
+        
+        alerts.append({
+            'window_id': window_id,
+            'alert_level': alert_level,
+            'severity': round(sev, 3),
+            'knn_distance': round(knn, 3),
+            'primary_cause': top_causes[0]['cause'] if top_causes else 'Unknown',
+            'causes': top_causes,
+            'top_features': top_features_list,
+            'recommendations': recommendations,
+            'context': context,
+            'timestamp': datetime.now().isoformat()
+        })
     
-    # Add context-specific details
-    context = {}
-    if 'max_speed_mean' in row.index and pd.notna(row['max_speed_mean']):
-        context['speed_limit'] = round(row['max_speed_mean'], 0)
-        context['actual_speed'] = round(row['speed_kmh_mean'], 0)
-        if context['actual_speed'] > context['speed_limit']:
-            context['speed_excess'] = round(context['actual_speed'] - context['speed_limit'], 0)
-    
-    if 'num_lanes_mean' in row.index and pd.notna(row['num_lanes_mean']):
-        context['num_lanes'] = round(row['num_lanes_mean'], 0)
-    
-    if 'dist_front_mean' in row.index and pd.notna(row['dist_front_mean']):
-        context['following_distance'] = round(row['dist_front_mean'], 1)
-    
-    # Determine alert level
-    if severity > 0.7:
-        alert_level = 'critical'
-    elif severity > 0.4:
-        alert_level = 'warning'
-    else:
-        alert_level = 'caution'
-    
-    # Get top contributing features
-    top_feat = top_features.loc[row.name].nlargest(6)
-    top_features_list = [
-        {'feature': feat, 'contribution': round(val * 100, 1)}
-        for feat, val in top_feat.items()
-    ]
-    
-    return {
-        'window_id': int(row.name),
-        'alert_level': alert_level,
-        'severity': round(severity, 3),
-        'knn_distance': round(knn_dist, 3),
-        'primary_cause': top_causes[0]['cause'] if top_causes else 'Unknown',
-        'causes': top_causes,
-        'top_features': top_features_list,
-        'recommendations': recommendations,
-        'context': context,
-        'timestamp': datetime.now().isoformat()
-    }
+    return alerts
 
 # ============================================================================
 # MAIN PIPELINE
@@ -409,40 +424,46 @@ def run_phase3_pipeline(df, road_type='motor', filter_gps=False):
     if filter_gps:
         df = filter_data_quality(df)
     
+    # One contiguous float32 feature matrix shared by every stage below;
+    # rows follow df
+    X = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32))
+    
     # Step 3: Train anomaly detector
-    scaler, knn, normal_df = train_anomaly_detector(df, feature_cols)
+    scaler, knn, normal_mask = train_anomaly_detector(X, df['label'].to_numpy())
+    
+    # Standardize once; detection, clustering and contributions all reuse it
+    mu = scaler.mean_.astype(np.float32)
+    inv_sigma = (1.0 / scaler.scale_).astype(np.float32)
+    X_scaled = _standardize(X, mu, inv_sigma)
     
     # Step 4: Detect anomalies
-    df, threshold = detect_anomalies(df, scaler, knn, feature_cols)
+    df, threshold = detect_anomalies(df, X_scaled, knn)
     
     # Step 5: Cluster anomalies
-    df, kmeans = cluster_anomalies(df, scaler, feature_cols, n_clusters=3)
+    df, kmeans = cluster_anomalies(df, X_scaled, n_clusters=3)
     
     # Step 6: Label clusters
     df, cluster_labels = label_clusters(df, feature_cols)
     
     # Step 7: Compute feature contributions
-    contrib_norm = compute_feature_contributions(df, scaler, feature_cols)
+    contrib_norm_arr = compute_feature_contributions(X_scaled)
     
     # Step 8: Compute cause contributions
-    filtered_cause_groups = {
-        cause: [f for f in features if f in feature_cols]
-        for cause, features in CAUSE_GROUPS.items()
-    }
-    filtered_cause_groups = {k: v for k, v in filtered_cause_groups.items() if v}
-    
-    cause_contributions = compute_cause_contributions(contrib_norm, filtered_cause_groups)
+    cause_idx = cause_column_indices(feature_cols, CAUSE_GROUPS)
+    cause_names = list(cause_idx)
+    cause_mat = compute_cause_contributions(contrib_norm_arr, list(cause_idx.values()))
     
     # Step 9: Compute quantiles for severity normalization
-    normal_dist = df[df['label'] == NORMAL_LABEL]['knn_distance']
-    q95 = normal_dist.quantile(0.95)
-    q99 = normal_dist.quantile(0.99)
+    # Both quantiles from a single sort of the normal distances
+    q95, q99 = np.quantile(df.loc[df['label'] == NORMAL_LABEL, 'knn_distance'].to_numpy(), [0.95, 0.99])
+    
+    # Step 9b: Severity and fuzzy intensity for every (window, cause) pair in one pass
+    severity = normalize_severity(df['knn_distance'].to_numpy(), q95, q99)
+    intensity_mat = compute_intensity_matrix(severity, cause_mat)
     
     # Step 10: Generate alerts for all windows
-    alerts = []
-    for idx, row in df.iterrows():
-        alert = generate_alert(row, threshold, q95, q99, cause_contributions, contrib_norm)
-        alerts.append(alert)
+    alerts = generate_alerts(df, threshold, severity, cause_names, cause_mat, intensity_mat,
+                             contrib_norm_arr, feature_cols)
     
     # Summary statistics
     summary = {
@@ -477,8 +498,8 @@ def run_phase3_pipeline(df, road_type='motor', filter_gps=False):
 
 def save_alerts_json(alerts, output_path):
     """Save alerts to JSON file"""
-    with open(output_path, 'w') as f:
-        json.dump(alerts, f, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(alerts, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     print(f"\nAlerts saved to: {output_path}")
 
 def print_alert_summary(alerts, top_n=10):
@@ -517,25 +538,20 @@ def print_alert_summary(alerts, top_n=10):
 # EXAMPLE USAGE
 # ============================================================================
 
+def run_road_pipeline(csv_path, road_type):
+    """Load one road type's window features and run the full pipeline on it"""
+    df = pd.read_csv(csv_path)
+    return run_phase3_pipeline(df, road_type=road_type, filter_gps=False)
+
 if __name__ == "__main__":
-    # Load data
+    # Motor and secondary roads are independent end-to-end runs; process
+    # them side by side (their log output interleaves)
     print("Loading data...")
-    motor_df = pd.read_csv("data/motor_window_features.csv")
-    secondary_df = pd.read_csv("data/secondary_window_features.csv")
-    
-    # Process motor roads
-    motor_df, motor_alerts, motor_summary = run_phase3_pipeline(
-        motor_df, 
-        road_type='motor',
-        filter_gps=False
-    )
-    
-    # Process secondary roads
-    secondary_df, secondary_alerts, secondary_summary = run_phase3_pipeline(
-        secondary_df,
-        road_type='secondary', 
-        filter_gps=False
-    )
+    with ProcessPoolExecutor(max_workers=2) as ex:
+        motor_future = ex.submit(run_road_pipeline, "data/motor_window_features.csv", 'motor')
+        secondary_future = ex.submit(run_road_pipeline, "data/secondary_window_features.csv", 'secondary')
+        motor_df, motor_alerts, motor_summary = motor_future.result()
+        secondary_df, secondary_alerts, secondary_summary = secondary_future.result()
     
     # Save outputs
     save_alerts_json(motor_alerts, 'motor_alerts.json')
@@ -551,8 +567,8 @@ if __name__ == "__main__":
         'secondary': secondary_summary,
         'generated_at': datetime.now().isoformat()
     }
-    with open('pipeline_summary.json', 'w') as f:
-        json.dump(combined_summary, f, indent=2)
+    with open('pipeline_summary.json', 'wb') as f:
+        f.write(orjson.dumps(combined_summary, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print("\n✅ Phase 3 pipeline complete!")
     print("Generated files:")
@@ -1,5 +1,5 @@
 import pandas as pd  
-import json  
+import orjson
 
 folder = "C:\\Users\\lorna\\OneDrive\\Desktop\\DriveIQ\\ml-model\\notebooks\\data\\D5-Aggressive-motor"  
 
@@ -20,40 +20,33 @@ if folder_name.startswith("d"):
 else:
     session_id = 0
 
+def read_sensor_file(name):
+    # Whitespace-separated numeric table -> list of rows. preprocessing_inference
+    # accepts positional rows as well as records, and rows are far smaller
+    # than one {"0": ..., "1": ...} dict per line.
+    return pd.read_csv(
+        f"{folder}/{name}",
+        sep=r"\s+",
+        header=None,
+        engine="c"
+    ).to_numpy().tolist()
+
 sensor_json = {
     "session_id": session_id,
     "road_type": road_type,
     
-    "gps": pd.read_csv(
-        f"{folder}/RAW_GPS.txt",
-        sep=r"\s+",
-        header=None
-    ).to_dict(orient="records"),
+    "gps": read_sensor_file("RAW_GPS.txt"),
 
-    "accelerometer": pd.read_csv(
-        f"{folder}/RAW_ACCELEROMETERS.txt",
-        sep=r"\s+",
-        header=None
-    ).to_dict(orient="records"),
+    "accelerometer": read_sensor_file("RAW_ACCELEROMETERS.txt"),
 
-    "lane": pd.read_csv(
-        f"{folder}/PROC_LANE_DETECTION.txt",
-        sep=r"\s+",
-        header=None
-    ).to_dict(orient="records"),
+    "lane": read_sensor_file("PROC_LANE_DETECTION.txt"),
 
-    "vehicle": pd.read_csv(
-        f"{folder}/PROC_VEHICLE_DETECTION.txt",
-        sep=r"\s+",
-        header=None
-    ).to_dict(orient="records"),
+    "vehicle": read_sensor_file("PROC_VEHICLE_DETECTION.txt"),
 
-    "osm": pd.read_csv(
-        f"{folder}/PROC_OPENSTREETMAP_DATA.txt",
-        sep=r"\s+",
-        header=None
-    ).to_dict(orient="records"),
+    "osm": read_sensor_file("PROC_OPENSTREETMAP_DATA.txt"),
 }
 
-with open("test_session.json", "w") as f:  
-    json.dump(sensor_json, f, indent=4)
\ No newline at end of file
+# Compact output: indenting every row of the sensor tables would multiply the
+# file size. NaN cells come out as null (valid JSON) rather than a bare NaN.
+with open("test_session.json", "wb") as f:
+    f.write(orjson.dumps(sensor_json))
\ No newline at end of file
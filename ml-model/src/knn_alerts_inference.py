@@ -15,17 +15,45 @@ import logging
 import numpy as np
 import pandas as pd
 import joblib
+from collections import Counter
+from functools import lru_cache
 
 logger = logging.getLogger("driveiq.knn_alerts")
 
 # ── Model directory ──
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 
+# ── Alert causes (order is the argmax tie-break order) ──
+ALERT_CAUSES = ("Harsh Driving", "Overspeeding", "Unstable Steering", "Tailgating")
+
+# Window-mean columns the cause scores are built from, with the value used
+# when a column is absent or NaN (a missing TTC means no car in front)
+SCORE_COLS = {
+    "vert_acc_mean": 0.0, "horiz_acc_mean": 0.0, "speed_kmh_mean": 0.0,
+    "speed_ratio_mean": 0.0, "difcourse_mean": 0.0, "course_mean": 0.0,
+    "ttc_front_mean": 10.0,
+}
+
+# Indexed like ALERT_CAUSES: (feature, column, unit) reported per alert
+TRIGGER_FEATURES = (
+    (("Vertical Acc", "vert_acc_mean", "m/s\u00b2"), ("Horizontal Acc", "horiz_acc_mean", "m/s\u00b2")),
+    (("Speed (km/h)", "speed_kmh_mean", "km/h"), ("Speed Ratio", "speed_ratio_mean", "ratio")),
+    (("Course Change", "difcourse_mean", "deg"), ("Horizontal Acc", "horiz_acc_mean", "m/s\u00b2")),
+    (("TTC Front", "ttc_front_mean", "seconds"),),
+)
+
+# Indexed by cause index + 1 (-1 = no alert): (alert, alert_cause)
+ALERT_FIELDS = (("No alert", "None"),) + tuple(("Abnormal", cause) for cause in ALERT_CAUSES)
+
 
 # ============================================================
 # Load KNN components
 # ============================================================
 
+# Cached per road_type string: both the pipeline and run_knn_alerts ask for
+# the same components, and every later session reuses them. Treat the
+# returned objects as read-only.
+@lru_cache(maxsize=4)
 def load_knn_components(road_type):
 
     road_type_clean = road_type.strip().lower()
@@ -60,15 +88,11 @@ def load_knn_components(road_type):
 
 def create_knn_ready_windows_inference(windows, knn_feature_cols):
 
-    rows = []
-    for win_idx in range(windows.shape[0]):
-        window = windows[win_idx]
-        row = {}
-        for i, col_name in enumerate(knn_feature_cols):
-            row[col_name] = np.mean(window[:, i])
-        rows.append(row)
+    # Per-window mean of each of the first len(knn_feature_cols) channels,
+    # all windows in one reduction
+    means = windows[:, :, :len(knn_feature_cols)].mean(axis=1)
 
-    return pd.DataFrame(rows)
+    return pd.DataFrame(means, columns=knn_feature_cols)
 
 
 # ============================================================
@@ -77,113 +101,121 @@ def create_knn_ready_windows_inference(windows, knn_feature_cols):
 
 def run_knn_alerts(knn_feature_df, road_type):
 
+    return run_knn_alerts_batch([knn_feature_df], road_type)[0]
+
+
+def run_knn_alerts_batch(knn_feature_dfs, road_type):
+    """
+    run_knn_alerts for several sessions of the same road type: one scale
+    and one kneighbors call over the stacked windows, then per-session
+    scoring (severity is still normalized within each session).
+    """
+
     knn_model, scaler, knn_feature_cols, threshold = load_knn_components(road_type)
 
-    X = knn_feature_df[knn_feature_cols].copy()
-    X_scaled = scaler.transform(X)
+    # Apply the fitted statistics to a plain float64 matrix (the dtype the
+    # KNN index was fitted in) instead of copying the frame for transform()
+    X = np.vstack([df[knn_feature_cols].to_numpy(dtype=np.float64) for df in knn_feature_dfs])
+    X_scaled = (X - scaler.mean_) / scaler.scale_
 
+    # Anomaly score is the mean distance to the k neighbours the thresholds
+    # were calibrated on; sum / k is what mean computes, minus its overhead
     distances, _ = knn_model.kneighbors(X_scaled)
-    knn_distance = distances.mean(axis=1)
-
-    window_results = []
-    raw_severities = []
-
-    for i in range(len(knn_distance)):
-
-        row = knn_feature_df.iloc[i]
-
-        alert_label = "No alert"
-        alert_cause = "None"
-        severity = 0.0
-        trigger_features = []
-
-        if knn_distance[i] > threshold:
-
-            alert_label = "Abnormal"
-
-            harsh_score = abs(row.get("vert_acc_mean", 0)) + abs(row.get("horiz_acc_mean", 0))
-            overspeed_score = row.get("speed_kmh_mean", 0) + row.get("speed_ratio_mean", 0)
-            unstable_score = (
-                abs(row.get("difcourse_mean", 0)) +
-                abs(row.get("horiz_acc_mean", 0)) +
-                abs(row.get("course_mean", 0))
-            )
-            tailgating_score = 0
-            if row.get("ttc_front_mean", 10) < 2:
-                tailgating_score = 2 - row["ttc_front_mean"]
-
-            scores = {
-                "Harsh Driving": harsh_score,
-                "Overspeeding": overspeed_score,
-                "Unstable Steering": unstable_score,
-                "Tailgating": tailgating_score
-            }
-
-            alert_cause = max(scores, key=scores.get)
-            severity = float(scores[alert_cause])
-
-            if alert_cause == "Overspeeding":
-                trigger_features = [
-                    {"feature": "Speed (km/h)", "value": round(float(row["speed_kmh_mean"]), 2), "unit": "km/h"},
-                    {"feature": "Speed Ratio", "value": round(float(row["speed_ratio_mean"]), 2), "unit": "ratio"}
-                ]
-            elif alert_cause == "Harsh Driving":
-                trigger_features = [
-                    {"feature": "Vertical Acc", "value": round(float(row["vert_acc_mean"]), 2), "unit": "m/s\u00b2"},
-                    {"feature": "Horizontal Acc", "value": round(float(row["horiz_acc_mean"]), 2), "unit": "m/s\u00b2"}
-                ]
-            elif alert_cause == "Unstable Steering":
-                trigger_features = [
-                    {"feature": "Course Change", "value": round(float(row["difcourse_mean"]), 2), "unit": "deg"},
-                    {"feature": "Horizontal Acc", "value": round(float(row["horiz_acc_mean"]), 2), "unit": "m/s\u00b2"}
-                ]
-            elif alert_cause == "Tailgating":
-                trigger_features = [
-                    {"feature": "TTC Front", "value": round(float(row["ttc_front_mean"]), 2), "unit": "seconds"}
-                ]
-
-        raw_severities.append(severity)
-
-        window_results.append({
-            "window_id": int(row["window_id"]),
-            "predicted_label": row["predicted_label"],
-            "alert": alert_label,
-            "alert_cause": alert_cause,
-            "severity_raw": severity,
-            "knn_distance": round(float(knn_distance[i]), 4),
-            "trigger_features": trigger_features
-        })
+    knn_distance = distances.sum(axis=1) / distances.shape[1]
+
+    splits = np.cumsum([len(df) for df in knn_feature_dfs])[:-1]
+
+    return [
+        _score_windows(df, session_distance, threshold)
+        for df, session_distance in zip(knn_feature_dfs, np.split(knn_distance, splits))
+    ]
+
+
+def _score_windows(knn_feature_df, knn_distance, threshold):
+
+    abnormal = knn_distance > threshold
+    cause_idx = np.full(len(knn_distance), -1)
+    raw_severities = np.zeros(len(knn_distance))
+    triggers = {}
+
+    # Only windows over the threshold get a cause; typical sessions have
+    # few or none, so score just those rows (and skip it all when empty)
+    if abnormal.any():
+        rows_idx = np.flatnonzero(abnormal)
+
+        # One column array per signal, an (n_abnormal, 4) score matrix in
+        # ALERT_CAUSES order, argmax for the cause
+        raw = knn_feature_df.iloc[rows_idx].reindex(columns=list(SCORE_COLS)).to_numpy(dtype=np.float64)
+        raw = np.where(np.isnan(raw), np.fromiter(SCORE_COLS.values(), dtype=np.float64), raw)
+        values = dict(zip(SCORE_COLS, raw.T))
+        vert, horiz = values["vert_acc_mean"], values["horiz_acc_mean"]
+        ttc = values["ttc_front_mean"]
+
+        scores = np.stack([
+            np.abs(vert) + np.abs(horiz),
+            values["speed_kmh_mean"] + values["speed_ratio_mean"],
+            np.abs(values["difcourse_mean"]) + np.abs(horiz) + np.abs(values["course_mean"]),
+            np.maximum(0.0, 2 - ttc),
+        ], axis=1)
+
+        cause_idx[rows_idx] = scores.argmax(axis=1)
+        raw_severities[rows_idx] = scores.max(axis=1)
+
+        triggers = {
+            i: [
+                {"feature": name, "value": round(float(values[col][j]), 2), "unit": unit}
+                for name, col, unit in TRIGGER_FEATURES[cause]
+            ]
+            for j, (i, cause) in enumerate(zip(rows_idx.tolist(), cause_idx[rows_idx].tolist()))
+        }
 
     # Normalize severity to 0-100
-    min_s = min(raw_severities)
-    max_s = max(raw_severities)
-
-    for w in window_results:
-        if max_s > min_s:
-            w["severity"] = round(((w["severity_raw"] - min_s) / (max_s - min_s)) * 100, 2)
-        else:
-            w["severity"] = 0
-        del w["severity_raw"]
+    min_s, max_s = raw_severities.min(), raw_severities.max()
+    if max_s > min_s:
+        severities = np.round((raw_severities - min_s) / (max_s - min_s) * 100, 2).tolist()
+    else:
+        severities = [0] * len(raw_severities)
+
+    # Plain Python lists zip faster than per-element ndarray indexing
+    rows = zip(
+        knn_feature_df["window_id"].tolist(),
+        knn_feature_df["predicted_label"].tolist(),
+        (ALERT_FIELDS[cause + 1] for cause in cause_idx.tolist()),
+        knn_distance.tolist(),
+        severities,
+    )
 
-    return window_results
+    return [
+        {
+            "window_id": int(window_id),
+            "predicted_label": predicted_label,
+            "alert": alert,
+            "alert_cause": alert_cause,
+            "knn_distance": round(distance, 4),
+            "trigger_features": triggers.get(i, []),
+            "severity": severity
+        }
+        for i, (window_id, predicted_label, (alert, alert_cause), distance, severity) in enumerate(rows)
+    ]
 
 
 # ============================================================
 # Build session-level summary
 # ============================================================
 
-def build_session_summary(result_df, road_type, session_id):
+def build_session_summary(window_results, road_type, session_id):
 
-    total_windows = len(result_df)
-    total_alerts = int((result_df["alert"] == "Abnormal").sum())
+    total_windows = len(window_results)
 
-    dominant_alert = (
-        result_df[result_df["alert_cause"] != "None"]["alert_cause"].value_counts().idxmax()
-        if total_alerts > 0 else "None"
-    )
+    # Straight off the window dicts; a DataFrame here cost more than the sums
+    causes = Counter(w["alert_cause"] for w in window_results if w["alert"] == "Abnormal")
+    total_alerts = sum(causes.values())
 
-    avg_severity = result_df["severity"].mean()
-    max_severity = result_df["severity"].max()
+    dominant_alert = causes.most_common(1)[0][0] if total_alerts > 0 else "None"
+
+    severity = np.fromiter((w["severity"] for w in window_results), dtype=np.float64, count=total_windows)
+    avg_severity = severity.mean()
+    max_severity = severity.max()
 
     session_risk_score = (
         (total_alerts / total_windows) * 50 +
@@ -231,7 +263,8 @@ def run_full_knn_pipeline(sensor_json):
     df = preprocess_session_from_json(sensor_json)
 
     stride = 240 if road_type.lower() == "motorway" else 260
-    windows = create_windows_inference(df, 2400, stride)
+    # Only per-window means are taken from these, so skip the copy
+    windows = create_windows_inference(df, 2400, stride, copy=False)
 
     if windows.shape[0] == 0:
         raise ValueError("Not enough data for windowing")
@@ -246,9 +279,7 @@ def run_full_knn_pipeline(sensor_json):
 
     window_results = run_knn_alerts(knn_feature_df, road_type)
 
-    result_df = pd.DataFrame(window_results)
-
-    session_summary = build_session_summary(result_df, road_type, session_id)
+    session_summary = build_session_summary(window_results, road_type, session_id)
 
     return {
         "session_summary": session_summary,
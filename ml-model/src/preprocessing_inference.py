@@ -12,11 +12,12 @@ Changes from original:
 import os
 import json
 import logging
+import threading
 import numpy as np
 import pandas as pd
 import joblib
+from functools import lru_cache
 from collections import Counter
-from sklearn.impute import KNNImputer
 
 logger = logging.getLogger("driveiq.preprocessing")
 
@@ -38,10 +39,69 @@ def build_10hz_timebase(max_timestamp_sec):
     return t_10hz
 
 
+def _sorted_by_timestamp(stream):
+    # Sensor logs are almost always in time order already: an O(N) check
+    # instead of a sort, and a stable sort (duplicates keep arrival order)
+    # when they are not
+    if stream["timestamp"].is_monotonic_increasing:
+        return stream
+    return stream.sort_values("timestamp", kind="mergesort")
+
+
+def _asof_indices(stream_ts, target_ts, direction):
+    """
+    Row of the sorted `stream_ts` that pd.merge_asof(direction=...) would
+    match to each target timestamp, or -1 where there is none. "nearest"
+    ties resolve to the backward row, as in merge_asof.
+    """
+    back = np.searchsorted(stream_ts, target_ts, side="right") - 1
+    if direction == "backward" or len(stream_ts) == 0:
+        return back
+
+    fwd = np.searchsorted(stream_ts, target_ts, side="left")
+    fwd_ts = stream_ts[np.minimum(fwd, len(stream_ts) - 1)]
+    back_ts = stream_ts[np.maximum(back, 0)]
+    use_fwd = (fwd < len(stream_ts)) & (
+        (back < 0) | (fwd_ts - target_ts < target_ts - back_ts)
+    )
+    return np.where(use_fwd, fwd, back)
+
+
+def _align_stream(stream, target_ts, direction):
+    """
+    merge_asof of one timestamp-sorted stream onto the 10 Hz timestamps,
+    returned as {column: aligned array} (unmatched rows are NaN).
+    """
+    idx = _asof_indices(stream["timestamp"].to_numpy(), target_ts, direction)
+    missing = idx < 0
+    has_missing = missing.any()
+    take = np.maximum(idx, 0)
+
+    aligned = {}
+    for col in stream.columns:
+        if col == "timestamp":
+            continue
+        values = stream[col].to_numpy()
+        if has_missing and values.dtype.kind != "f":
+            values = values.astype(np.float64 if values.dtype.kind in "iu" else object)
+        out = values[take] if len(values) else np.full(len(idx), np.nan, dtype=values.dtype)
+        if has_missing:
+            out[missing] = np.nan
+        aligned[col] = out
+    return aligned
+
+
 # =====================================================
 # STEP 2: Preprocess ONE session from JSON
 # =====================================================
 
+@lru_cache(maxsize=1)
+def _load_feature_order():
+    # Parsed once per process rather than on every session
+    with open(os.path.join(MODELS_DIR, "feature_schema.json"), "r") as f:
+        return json.load(f)["feature_order"]
+
+
 def preprocess_session_from_json(sensor_json):
     """
     Preprocess one driving session from JSON input.
@@ -54,6 +114,16 @@ def preprocess_session_from_json(sensor_json):
         """If keys are '0','1','2'... rename to actual column names."""
         if not records:
             return pd.DataFrame(columns=col_names)
+        if isinstance(records[0], (list, tuple)):
+            # Row lists (create_test_session_json's format): one C-level
+            # float64 build. Streams with text columns (OSM road type)
+            # fall through to pandas' per-column inference.
+            try:
+                arr = np.asarray(records, dtype=np.float64)
+            except (TypeError, ValueError):
+                arr = None
+            if arr is not None and arr.ndim == 2 and arr.shape[1] == len(col_names):
+                return pd.DataFrame(arr, columns=col_names)
         df = pd.DataFrame(records)
         if set(df.columns) == set(str(i) for i in range(len(col_names))):
             df.columns = col_names
@@ -70,9 +140,13 @@ def preprocess_session_from_json(sensor_json):
     gps["timestamp"] = pd.to_numeric(gps["timestamp"], errors="coerce")
     max_time = gps["timestamp"].max()
     timebase_10hz = build_10hz_timebase(max_time)
-    gps = gps.sort_values("timestamp")
-    timebase_10hz = timebase_10hz.sort_values("timestamp")
-    gps_10hz = pd.merge_asof(timebase_10hz, gps, on="timestamp", direction="backward")
+    target_ts = timebase_10hz["timestamp"].to_numpy()
+    gps = _sorted_by_timestamp(gps)
+
+    # Every stream is aligned straight into one column dict (a searchsorted
+    # per stream) and becomes a single DataFrame after the last one
+    data = {"t_10hz": timebase_10hz["t_10hz"].to_numpy(), "timestamp": target_ts}
+    data.update(_align_stream(gps, target_ts, "backward"))
 
     # ── Accelerometer (already 10 Hz) ──
     acc = _rename_cols(sensor_json["accelerometer"], [
@@ -82,16 +156,16 @@ def preprocess_session_from_json(sensor_json):
         "roll", "pitch", "yaw"
     ])
     acc["timestamp"] = pd.to_numeric(acc["timestamp"], errors="coerce")
-    acc = acc.sort_values("timestamp")
-    acc_10hz = pd.merge_asof(timebase_10hz, acc, on="timestamp", direction="nearest")
+    acc = _sorted_by_timestamp(acc)
+    data.update(_align_stream(acc, target_ts, "nearest"))
 
     # ── Lane Detection (~30 Hz → 10 Hz) ──
     lane = _rename_cols(sensor_json["lane"], [
         "timestamp", "x_lane", "phi", "road_width", "lane_state"
     ])
     lane["timestamp"] = pd.to_numeric(lane["timestamp"], errors="coerce")
-    lane = lane.sort_values("timestamp")
-    lane_10hz = pd.merge_asof(timebase_10hz, lane, on="timestamp", direction="nearest")
+    lane = _sorted_by_timestamp(lane)
+    data.update(_align_stream(lane, target_ts, "nearest"))
 
     # ── Vehicle Detection (~10 Hz) ──
     veh = _rename_cols(sensor_json["vehicle"], [
@@ -99,8 +173,8 @@ def preprocess_session_from_json(sensor_json):
         "num_vehicles", "gps_speed"
     ])
     veh["timestamp"] = pd.to_numeric(veh["timestamp"], errors="coerce")
-    veh = veh.sort_values("timestamp")
-    veh_10hz = pd.merge_asof(timebase_10hz, veh, on="timestamp", direction="nearest")
+    veh = _sorted_by_timestamp(veh)
+    data.update(_align_stream(veh, target_ts, "nearest"))
 
     # ── OpenStreetMap Data (~1 Hz → 10 Hz) ──
     osm = _rename_cols(sensor_json["osm"], [
@@ -109,18 +183,10 @@ def preprocess_session_from_json(sensor_json):
         "lat_osm", "lon_osm", "osm_delay", "gps_speed_osm"
     ])
     osm["timestamp"] = pd.to_numeric(osm["timestamp"], errors="coerce")
-    osm = osm.sort_values("timestamp")
-    osm_10hz = pd.merge_asof(timebase_10hz, osm, on="timestamp", direction="backward")
-
-    # ── Merge all streams ──
-    data = gps_10hz.copy()
-    for df in [acc_10hz, lane_10hz, veh_10hz, osm_10hz]:
-        data = data.merge(df, on=["timestamp", "t_10hz"], how="left")
+    osm = _sorted_by_timestamp(osm)
+    data.update(_align_stream(osm, target_ts, "backward"))
 
-    cols = ["t_10hz", "timestamp"] + [
-        c for c in data.columns if c not in ["t_10hz", "timestamp"]
-    ]
-    data = data[cols]
+    data = pd.DataFrame(data)
 
     # ── Feature engineering ──
     data["speed_ratio"] = np.where(
@@ -129,28 +195,27 @@ def preprocess_session_from_json(sensor_json):
         0
     )
 
-    # ── KNN imputation ──
+    # ── Gap filling ──
+    # The gaps are short runs left by the asof alignment on a uniform 10 Hz
+    # grid, so linear interpolation (edges held at the nearest reading) does
+    # the job of the old per-session KNNImputer in O(N) instead of O(N^2).
+    # Column medians cover anything interpolation cannot reach.
     exclude_cols = ["t_10hz", "timestamp", "road_type_osm"]
     feature_cols = [c for c in data.columns if c not in exclude_cols]
 
-    X = data[feature_cols]
+    X = data[feature_cols].astype(np.float64)
     nan_count = X.isna().sum().sum()
     if nan_count > 0:
-        logger.info(f"Imputing {nan_count} NaN values with KNN...")
+        logger.info(f"Imputing {nan_count} NaN values by interpolation...")
 
-    imputer = KNNImputer(n_neighbors=5, weights="distance")
-    X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=feature_cols)
+    X_imputed = X.interpolate(method="linear", limit_direction="both")
+    X_imputed = X_imputed.fillna(X.median())
 
     data_imputed = data.copy()
     data_imputed[feature_cols] = X_imputed
 
     # ── Enforce training feature order ──
-    schema_path = os.path.join(MODELS_DIR, "feature_schema.json")
-    with open(schema_path, "r") as f:
-        schema = json.load(f)
-
-    feature_order = schema["feature_order"]
-    data_final = data_imputed[feature_order]
+    data_final = data_imputed[_load_feature_order()]
 
     logger.info(f"Preprocessed shape: {data_final.shape}")
     return data_final
@@ -160,48 +225,103 @@ def preprocess_session_from_json(sensor_json):
 # Windowing
 # =====================================================
 
-def create_windows_inference(df, window_size=2400, stride=240):
+def create_windows_inference(df, window_size=2400, stride=240, copy=True):
+    """
+    (num_windows, window_size, num_features) windows over df's rows.
+    copy=False returns the read-only strided view instead, for callers that
+    only reduce over the windows and never need them materialised.
+    """
     data = df.values
     n_rows = data.shape[0]
-    windows = []
-
-    for start in range(0, n_rows - window_size + 1, stride):
-        end = start + window_size
-        windows.append(data[start:end])
 
-    if len(windows) == 0:
+    if n_rows < window_size:
         return np.empty((0, window_size, df.shape[1]))
 
-    return np.array(windows)
+    # Strided view over data (no copy), then a single materialisation into
+    # the contiguous (num_windows, window_size, num_features) array
+    view = np.lib.stride_tricks.sliding_window_view(data, window_size, axis=0)[::stride]
+    view = view.transpose(0, 2, 1)
+    return np.ascontiguousarray(view) if copy else view
 
 
 # =====================================================
 # Scaling
 # =====================================================
 
+@lru_cache(maxsize=4)
+def _load_scaler_params(scaler_path):
+    """Fitted (mean_, scale_) of a StandardScaler, loaded once per file."""
+    scaler = joblib.load(scaler_path)
+    return scaler.mean_, scaler.scale_
+
+
 def scale_windows(windows, scaler_path):
     if windows.shape[0] == 0:
         return windows
 
-    original_shape = windows.shape
-    reshaped = windows.reshape(-1, original_shape[-1])
-
-    scaler = joblib.load(scaler_path)
-    scaled = scaler.transform(reshaped)
+    # (features,) stats broadcast over windows and timesteps: same result as
+    # scaler.transform on the flattened rows, without the reshape round trip
+    mean, scale = _load_scaler_params(scaler_path)
+    scaled = windows - mean
+    scaled /= scale
 
-    return scaled.reshape(original_shape)
+    return scaled
 
 
 # =====================================================
 # Prediction
 # =====================================================
 
+@lru_cache(maxsize=2)
+def _load_keras_model(model_path):
+    # Loaded once per model file; rebuilding the graph dominated short sessions
+    # compile=False: inference never needs the optimizer state
+    from tensorflow.keras.models import load_model
+    return load_model(model_path, compile=False)
+
+
+def _tflite_path(model_path):
+    return os.path.splitext(model_path)[0] + ".tflite"
+
+
+@lru_cache(maxsize=2)
+def _load_tflite_interpreter(tflite_path):
+    # The interpreter is stateful and shared by every caller thread (the
+    # feedback route runs on FastAPI's threadpool), so it carries its lock.
+    import tensorflow as tf
+
+    interp = tf.lite.Interpreter(model_path=tflite_path)
+    interp.allocate_tensors()
+    return interp, threading.Lock()
+
+
+def _predict_tflite(windows, tflite_path):
+    interp, lock = _load_tflite_interpreter(tflite_path)
+    in_idx = interp.get_input_details()[0]["index"]
+    out_idx = interp.get_output_details()[0]["index"]
+
+    # The whole session goes through as one batch
+    x = np.ascontiguousarray(windows, dtype=np.float32)
+    with lock:
+        if tuple(interp.get_input_details()[0]["shape"]) != x.shape:
+            interp.resize_tensor_input(in_idx, x.shape, strict=False)
+            interp.allocate_tensors()
+        interp.set_tensor(in_idx, x)
+        interp.invoke()
+        return interp.get_tensor(out_idx).copy()
+
+
 def predict_windows(windows, model_path):
     if windows.shape[0] == 0:
         return None
 
-    from tensorflow.keras.models import load_model
-    model = load_model(model_path)
+    # Quantised TFLite export wins when present (ML_TFLITE=0 forces Keras);
+    # produce it with backend/scripts/export_tflite.py <model_path>
+    tflite_path = _tflite_path(model_path)
+    if os.getenv("ML_TFLITE", "1") != "0" and os.path.exists(tflite_path):
+        return _predict_tflite(windows, tflite_path)
+
+    model = _load_keras_model(model_path)
     return model.predict(windows)
 
 